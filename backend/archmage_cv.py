@@ -2,6 +2,9 @@ import cv2
 import mediapipe as mp
 import time
 
+# The landmark buffer is shared with the recognizers in models/
+from models.landmarks import LandmarkBuffer
+
 # --- NEW PUNCH THRESHOLD ---
 AREA_THRESHOLD_MULTIPLIER = 1.5
 
@@ -51,6 +54,7 @@ class _GestureRecognizer: # Changed to _ to show it's "private"
                 )
 
                 # Memory for simple dynamic detection (punch detection uses area changes)
+                self.landmarks = LandmarkBuffer()
                 self.last_area = 0.0
                 self.last_gesture = "NONE"
 
@@ -87,21 +91,10 @@ class _GestureRecognizer: # Changed to _ to show it's "private"
                 """Compute a simple bounding-box area for the hand (normalized coords).
 
                 This is used for detecting quick forward motion (a punch) by
-                watching for a sudden increase in area.
+                watching for a sudden increase in area. The landmarks are
+                copied into a reusable float32 buffer rather than looped over.
                 """
-                lm = hand_landmarks.landmark
-                min_x, max_x = 1.0, 0.0
-                min_y, max_y = 1.0, 0.0
-
-                for p in lm:
-                    if p.x < min_x: min_x = p.x
-                    if p.x > max_x: max_x = p.x
-                    if p.y < min_y: min_y = p.y
-                    if p.y > max_y: max_y = p.y
-
-                width = max_x - min_x
-                height = max_y - min_y
-                return max(width * height, 0.0)
+                return self.landmarks.fill(hand_landmarks).area()
 
             def process(self, frame):
                 """Process one BGR frame and return (gesture, landmarks, frame).
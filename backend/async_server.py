@@ -0,0 +1,271 @@
+"""
+Async Game Server
+=================
+ASGI version of server.py: the same routes with the same JSON, served from
+one event loop. Long-polls and /command_stream connections wait on the
+session's waiters list instead of holding a thread, so thousands of idle
+players cost one coroutine each.
+
+Usage:
+    pip install uvicorn
+    python async_server.py
+    # or: uvicorn async_server:app --port 5001
+
+The Flask app in server.py keeps working exactly as before; both share the
+game logic in game.py.
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs
+
+import game
+import metrics
+from game import LONG_POLL_TIMEOUT, STREAM_KEEPALIVE, BadRequest
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-headers', b'Content-Type'),
+    (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+]
+
+http_metrics = metrics.HttpMetrics()
+
+
+class Request:
+    __slots__ = ("query", "data")
+
+    def __init__(self, query, data):
+        self.query = query
+        self.data = data
+
+    def arg(self, name, type=str):
+        values = self.query.get(name)
+        if not values:
+            return None
+        try:
+            return type(values[0])
+        except ValueError:
+            return None
+
+    def session(self):
+        """Same lookup as server.get_session: ?session_id= or the JSON body."""
+        return game.get_session(self.arg('session_id') or self.data.get('session_id'))
+
+
+async def read_request(scope, receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+
+    data = {}
+    if body:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            pass
+    if not isinstance(data, dict):
+        data = {}
+    return Request(parse_qs(scope['query_string'].decode()), data)
+
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())] + CORS_HEADERS,
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def wait_for_change(session, seq, timeout, disconnected=None):
+    """Async version of GameSession.wait_for_change.
+
+    Returns True if the session's version moved past `seq` before `timeout`
+    (or before the `disconnected` future finished).
+    """
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+
+    def wake():
+        loop.call_soon_threadsafe(changed.set)
+
+    with session.lock:
+        if session.seq != seq:
+            return True
+        session.waiters.append(wake)
+
+    waiting = [asyncio.ensure_future(changed.wait())]
+    if disconnected is not None:
+        waiting.append(disconnected)
+    try:
+        await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        return changed.is_set()
+    finally:
+        waiting[0].cancel()
+        with session.lock:
+            session.waiters.remove(wake)
+
+
+# --- Routes (same contracts as server.py) ---
+
+async def set_gesture(request, receive, send):
+    try:
+        payload = game.set_gesture(request.session(), request.data.get('gesture', 'NONE'))
+    except BadRequest as e:
+        await send_json(send, {'status': 'error', 'message': str(e)}, status=400)
+        return
+    await send_json(send, payload)
+
+
+async def add_mana(request, receive, send):
+    await send_json(send, game.add_mana(request.session(), request.data.get('amount', 30)))
+
+
+async def set_tutorial_mode(request, receive, send):
+    await send_json(send, game.set_tutorial_mode(request.session()))
+
+
+async def reset_combo(request, receive, send):
+    await send_json(send, game.reset_combo(request.session()))
+
+
+async def get_spell_stats(request, receive, send):
+    await send_json(send, game.spell_stats(request.session()))
+
+
+async def reset_spell_stats(request, receive, send):
+    await send_json(send, game.reset_spell_stats(request.session()))
+
+
+async def get_command(request, receive, send):
+    session = request.session()
+    since = request.arg('since', int)
+    if since is not None:
+        await wait_for_change(session, since, LONG_POLL_TIMEOUT)
+    await send_json(send, game.poll_command(session))
+
+
+async def ingest_gestures(request, receive, send):
+    try:
+        payload = game.ingest_gestures(request.session(), request.data.get('transitions', []))
+    except BadRequest as e:
+        await send_json(send, {'status': 'error', 'message': str(e)}, status=400)
+        return
+    await send_json(send, payload)
+
+
+async def command_stream(request, receive, send):
+    session_id = request.arg('session_id') or request.data.get('session_id')
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no')] + CORS_HEADERS,
+    })
+
+    disconnected = asyncio.ensure_future(wait_for_disconnect())
+    last_key = None
+    try:
+        while not disconnected.done():
+            # Re-fetching keeps the session alive while the stream is open
+            session = game.get_session(session_id)
+            message, last_key, seen = game.stream_update(session, last_key)
+            if message:
+                await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+
+            changed = await wait_for_change(session, seen, STREAM_KEEPALIVE, disconnected)
+            if not changed and not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+    finally:
+        disconnected.cancel()
+
+
+async def get_metrics(request, receive, send):
+    body = (http_metrics.render() + game.game_metrics.render()).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', metrics.CONTENT_TYPE.encode()),
+                    (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+ROUTES = {
+    ('POST', '/set_gesture'): set_gesture,
+    ('POST', '/add_mana'): add_mana,
+    ('POST', '/set_tutorial_mode'): set_tutorial_mode,
+    ('POST', '/reset_combo'): reset_combo,
+    ('GET', '/get_spell_stats'): get_spell_stats,
+    ('POST', '/reset_spell_stats'): reset_spell_stats,
+    ('GET', '/get_command'): get_command,
+    ('POST', '/ingest_gestures'): ingest_gestures,
+    ('GET', '/command_stream'): command_stream,
+    ('GET', '/metrics'): get_metrics,
+}
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                game.scheduler.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                game.scheduler.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    if scope['method'] == 'OPTIONS':
+        # CORS preflight for the JSON POSTs
+        await send({'type': 'http.response.start', 'status': 204, 'headers': CORS_HEADERS})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    start = time.perf_counter()
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        await send_json(send, {'status': 'error', 'message': 'not found'}, status=404)
+        http_metrics.observe(scope['method'], 'unmatched', 404, time.perf_counter() - start)
+        return
+
+    async def timed_send(message):
+        # Like server.py, a response is timed until it starts
+        if message['type'] == 'http.response.start':
+            http_metrics.observe(scope['method'], scope['path'], message['status'],
+                                 time.perf_counter() - start)
+        await send(message)
+
+    request = await read_request(scope, receive)
+    await handler(request, receive, timed_send)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ uvicorn not installed! Run: pip install uvicorn")
+        raise SystemExit(1)
+
+    print("--- CV Boss Battle Backend Server (async) ---")
+    print("Running on http://localhost:5001")
+    print("Serving gesture commands at /get_command and /command_stream")
+    print("Press CTRL+C to stop.")
+    uvicorn.run(app, port=5001, log_level="warning")
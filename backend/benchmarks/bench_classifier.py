@@ -0,0 +1,141 @@
+"""
+Gesture Classifier Benchmark
+============================
+Per-frame time of the gesture classifier on real landmark rows from
+data/gesture_training_data.csv, for each inference path the recognizer
+has. Every path must make the same decision (gesture or NONE at the 0.4
+threshold) as the original scikit-learn predict + predict_proba code on
+every row. The scikit-learn rows need gesture_model.pkl and scikit-learn.
+The "early exit" rows use FlatForest.decide(); the trees column is the
+mean number of trees evaluated per frame.
+
+Usage:
+    python benchmarks/bench_classifier.py --rows 500 [--batch 2] [--json out.json]
+"""
+
+import argparse
+import csv
+import json
+import os
+import pickle
+import sys
+import time
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND_DIR, os.path.join(BACKEND_DIR, 'models')]
+
+import archmage_cv_ml  # noqa: E402
+import gamelog  # noqa: E402
+
+DATA_FILE = os.path.join(BACKEND_DIR, 'data', 'gesture_training_data.csv')
+MODEL_FILE = os.path.join(BACKEND_DIR, 'data', 'gesture_model.pkl')
+
+
+def load_rows(limit):
+    with open(DATA_FILE) as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        n_features = sum(1 for name in header if name[0] in 'xyz' and name[1:].isdigit())
+        rows = [row[:n_features] for _, row in zip(range(limit), reader)]
+    return np.array(rows, dtype=np.float64)
+
+
+def sklearn_original(model):
+    """predict() then predict_proba(): the forest walked twice."""
+    def classify(row):
+        prediction = model.predict(row)[0]
+        confidence = max(model.predict_proba(row)[0])
+        return str(prediction) if confidence > archmage_cv_ml.CONFIDENCE_THRESHOLD else "NONE"
+    return classify
+
+
+def sklearn_single_pass(model):
+    recognizer = archmage_cv_ml.MLGestureRecognizer(model=model)
+    return lambda row: recognizer.predict_gestures(row)[0]
+
+
+def time_per_call(function, inputs, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            function(item)
+        best = min(best, (time.perf_counter() - start) / len(inputs))
+    return best
+
+
+def with_early_exit(recognizer, function):
+    """`function` run with the recognizer's early-exit mode switched on."""
+    def classify(item):
+        recognizer.early_exit = True
+        try:
+            return function(item)
+        finally:
+            recognizer.early_exit = False
+    return classify
+
+
+def run(rows, batch=2):
+    with open(MODEL_FILE, 'rb') as f:
+        sklearn_model = pickle.load(f)
+    recognizer = archmage_cv_ml.MLGestureRecognizer()
+    recognizer.load_model()
+    single = lambda row: recognizer.predict_gestures(row)[0]  # noqa: E731
+    early_single = with_early_exit(recognizer, single)
+    early_batch = with_early_exit(recognizer, recognizer.predict_gestures)
+
+    frames = [rows[i:i + 1] for i in range(len(rows))]
+    batches = [rows[i:i + batch] for i in range(0, len(rows) - batch + 1, batch)]
+    # name: (function, inputs, rows per input)
+    methods = {
+        'sklearn predict+proba': (sklearn_original(sklearn_model), frames, 1),
+        'sklearn single pass': (sklearn_single_pass(sklearn_model), frames, 1),
+        'recognizer': (single, frames, 1),
+        f'recognizer, batch of {batch}': (recognizer.predict_gestures, batches, batch),
+        f'recognizer, batch of {len(rows)}': (recognizer.predict_gestures, [rows], len(rows)),
+        'early exit': (early_single, frames, 1),
+        f'early exit, batch of {batch}': (early_batch, batches, batch),
+        f'early exit, batch of {len(rows)}': (early_batch, [rows], len(rows)),
+    }
+
+    expected = [sklearn_original(sklearn_model)(frame) for frame in frames]
+    results = {}
+    for name, (classify, inputs, per_call) in methods.items():
+        decisions, trees = [], []
+        for item in inputs:
+            got = classify(item)
+            decisions.extend([got] if per_call == 1 else got)
+            trees.extend(recognizer.last_trees_evaluated)
+        results[name] = {
+            'per_frame_ms': time_per_call(classify, inputs) * 1000 / per_call,
+            'mismatches': sum(got != want for got, want in zip(decisions, expected)),
+            # The sklearn rows walk all of its trees
+            'mean_trees': sum(trees) / len(trees) if name.startswith(('recognizer', 'early'))
+            else len(sklearn_model.estimators_),
+        }
+    return recognizer, results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Per-frame gesture classifier time")
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--batch', type=int, default=2, help="rows per batched call (e.g. two hands)")
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    gamelog.set_level('WARNING')
+    recognizer, results = run(load_rows(args.rows), args.batch)
+
+    base = results['sklearn predict+proba']['per_frame_ms']
+    print(f"{'method':<28} {'ms/frame':>9} {'speedup':>8} {'trees':>6} {'mismatches':>11}")
+    for name, row in results.items():
+        print(f"{name:<28} {row['per_frame_ms']:>9.3f} {base / row['per_frame_ms']:>7.1f}x "
+              f"{row['mean_trees']:>6.1f} {row['mismatches']:>11}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': args.rows, 'results': results}, f, indent=2)
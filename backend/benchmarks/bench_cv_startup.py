@@ -0,0 +1,105 @@
+"""
+CV Startup Benchmark
+====================
+Measures what importing archmage_cv_ml costs and what the deferred setup
+costs when it does happen, each in a fresh interpreter.
+
+    import          `import archmage_cv_ml` (should be near zero)
+    load_model      unpickling gesture_model.pkl
+    import_cv       importing OpenCV and MediaPipe
+    warm_up         building the MediaPipe graph and running one blank frame
+    open_camera     GestureCamera.open() up to the first camera frame
+
+Before imports were made lazy, `import archmage_cv_ml` paid for all of
+these at once. Steps whose dependencies (or camera) are missing are
+reported as skipped.
+
+Usage:
+    python benchmarks/bench_cv_startup.py --runs 5 [--camera] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(BACKEND_DIR, 'models')
+
+# Runs in the child interpreter; prints {step: seconds or null}
+CHILD = r"""
+import json, sys, time
+sys.path[:0] = [{backend!r}, {models!r}]
+import warnings
+warnings.simplefilter('ignore')
+timings = {{}}
+
+start = time.perf_counter()
+import archmage_cv_ml
+timings['import'] = time.perf_counter() - start
+
+import gamelog
+gamelog.set_level('WARNING')
+recognizer = archmage_cv_ml.MLGestureRecognizer()
+start = time.perf_counter()
+recognizer.load_model()
+timings['load_model'] = time.perf_counter() - start
+
+try:
+    start = time.perf_counter()
+    archmage_cv_ml._import_cv()
+    timings['import_cv'] = time.perf_counter() - start
+    start = time.perf_counter()
+    recognizer.warm_up()
+    timings['warm_up'] = time.perf_counter() - start
+except ImportError:
+    timings['import_cv'] = timings['warm_up'] = None
+
+timings['open_camera'] = None
+if {camera!r} and timings['import_cv'] is not None:
+    start = time.perf_counter()
+    with archmage_cv_ml.GestureCamera(warm_up=True):
+        timings['open_camera'] = time.perf_counter() - start
+
+print(json.dumps(timings))
+"""
+
+STEPS = ('import', 'load_model', 'import_cv', 'warm_up', 'open_camera')
+
+
+def run_once(camera=False):
+    code = CHILD.format(backend=BACKEND_DIR, models=MODELS_DIR, camera=camera)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def measure(runs, camera=False):
+    samples = [run_once(camera) for _ in range(runs)]
+    results = {}
+    for step in STEPS:
+        values = [s[step] for s in samples if s.get(step) is not None]
+        results[step] = {'median_ms': statistics.median(values) * 1000,
+                         'max_ms': max(values) * 1000} if values else None
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="archmage_cv_ml import and startup cost")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--camera', action='store_true', help="also open camera 0")
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    results = measure(args.runs, args.camera)
+    print(f"{'step':<12} {'median ms':>10} {'max ms':>10}")
+    for step, row in results.items():
+        if row is None:
+            print(f"{step:<12} {'skipped':>10}")
+        else:
+            print(f"{step:<12} {row['median_ms']:>10.1f} {row['max_ms']:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'runs': args.runs, 'results': results}, f, indent=2)
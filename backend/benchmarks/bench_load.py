@@ -0,0 +1,254 @@
+"""
+Load Test
+=========
+Simulates N virtual players against the backend and reports throughput and
+p50/p95/p99 latency per route.
+
+Each player holds gestures the way a real one does: single spells and the
+combo sequences from combos.SPELLS, each pose held for a few hundred
+milliseconds with hands-down NONE gaps between them. Every frame the player
+polls /get_command, and it calls /set_gesture whenever its pose changes.
+
+Players run either in this process through Flask's test client (no network,
+measures the game and route code), or over HTTP against a running server:
+
+    python benchmarks/bench_load.py --players 50 --seconds 10
+    python benchmarks/bench_load.py --url http://127.0.0.1:5001 --players 200
+
+Write results with --json and compare two versions with --baseline:
+
+    python benchmarks/bench_load.py --json before.json
+    python benchmarks/bench_load.py --baseline before.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from combos import SPELLS  # noqa: E402
+
+# Gesture sequences a player picks from; every spell with gestures is one
+SEQUENCES = [spell.gestures for spell in SPELLS if spell.gestures]
+# Frames a pose is held for, and frames of NONE between casts
+HOLD_FRAMES = (8, 30)
+REST_FRAMES = (5, 20)
+
+
+def gesture_frames(rng):
+    """Endless per-frame gestures for one player."""
+    while True:
+        for gesture in rng.choice(SEQUENCES):
+            for _ in range(rng.randint(*HOLD_FRAMES)):
+                yield gesture
+        for _ in range(rng.randint(*REST_FRAMES)):
+            yield "NONE"
+
+
+class InProcessClient:
+    """Calls server.app through the Flask test client."""
+
+    def __init__(self):
+        import server
+        self._client = server.app.test_client()
+
+    def get(self, path):
+        return self._client.get(path).get_json()
+
+    def post(self, path, payload=None):
+        return self._client.post(path, json=payload or {}).get_json()
+
+    def close(self):
+        pass
+
+
+class HttpClient:
+    """One keep-alive connection to a running server."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self._conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        self._conn.connect()
+        # http.client sends headers and body separately; don't let Nagle stall them
+        self._conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        self._conn.request(method, path, body, headers)
+        return json.loads(self._conn.getresponse().read())
+
+    def get(self, path):
+        return self._request('GET', path)
+
+    def post(self, path, payload=None):
+        return self._request('POST', path, json.dumps(payload or {}))
+
+    def close(self):
+        self._conn.close()
+
+
+def play(make_client, player, seed, fps, deadline, tutorial, results):
+    """Run one virtual player until `deadline`; adds its samples to `results`."""
+    client = make_client()
+    rng = random.Random(seed)
+    session = f"load-{player}"
+    latencies = {'/set_gesture': [], '/get_command': []}
+    commands = {}
+    errors = 0
+
+    if tutorial:
+        client.post(f'/set_tutorial_mode?session_id={session}')
+
+    frame_time = 1.0 / fps if fps else 0.0
+    next_frame = time.perf_counter()
+    last_gesture = "NONE"
+    for gesture in gesture_frames(rng):
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if frame_time:
+            if now < next_frame:
+                time.sleep(next_frame - now)
+            # A slow server makes players skip frames rather than queue them
+            next_frame = max(next_frame + frame_time, time.perf_counter())
+
+        try:
+            if gesture != last_gesture:
+                start = time.perf_counter()
+                client.post(f'/set_gesture?session_id={session}', {'gesture': gesture})
+                latencies['/set_gesture'].append(time.perf_counter() - start)
+                last_gesture = gesture
+
+            start = time.perf_counter()
+            data = client.get(f'/get_command?session_id={session}')
+            latencies['/get_command'].append(time.perf_counter() - start)
+        except (OSError, ValueError, http.client.HTTPException):
+            errors += 1
+            continue
+        command = data.get('command', 'NONE')
+        if command != 'NONE':
+            commands[command] = commands.get(command, 0) + 1
+
+    client.close()
+    results.append((latencies, commands, errors))
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(results, elapsed):
+    routes = {}
+    commands = {}
+    errors = 0
+    for latencies, player_commands, player_errors in results:
+        for route, samples in latencies.items():
+            routes.setdefault(route, []).extend(samples)
+        for command, count in player_commands.items():
+            commands[command] = commands.get(command, 0) + count
+        errors += player_errors
+
+    total = sum(len(samples) for samples in routes.values())
+    summary = {
+        'requests': total,
+        'errors': errors,
+        'requests_per_second': total / elapsed,
+        'commands': commands,
+        'routes': {},
+    }
+    for route, samples in routes.items():
+        samples.sort()
+        summary['routes'][route] = {
+            'requests': len(samples),
+            'p50_ms': _ms(percentile(samples, 50)),
+            'p95_ms': _ms(percentile(samples, 95)),
+            'p99_ms': _ms(percentile(samples, 99)),
+            'max_ms': _ms(samples[-1] if samples else None),
+        }
+    return summary
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+def run(players, seconds, fps=60, url=None, seed=0, tutorial=False):
+    """Run the load test and return the summary dict (see summarize)."""
+    if url:
+        make_client = lambda: HttpClient(url)  # noqa: E731
+    else:
+        import gamelog
+        # Per-command log lines would dominate an in-process run
+        gamelog.set_level('WARNING')
+        make_client = InProcessClient
+
+    results = []
+    start = time.perf_counter()
+    deadline = start + seconds
+    threads = [threading.Thread(target=play, daemon=True,
+                                args=(make_client, i, seed + i, fps, deadline, tutorial, results))
+               for i in range(players)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(results, time.perf_counter() - start)
+
+
+def print_summary(summary, baseline=None):
+    print(f"{summary['requests']} requests, {summary['requests_per_second']:.0f} req/s, "
+          f"{summary['errors']} errors")
+    if baseline:
+        print(f"  throughput vs. baseline: {_change(summary['requests_per_second'], baseline['requests_per_second'])}")
+    print(f"{'route':<14} {'requests':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route, row in summary['routes'].items():
+        print(f"{route:<14} {row['requests']:>9} " +
+              " ".join(f"{row[k]:>8.2f}" if row[k] is not None else f"{'-':>8}"
+                       for k in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')))
+        old = (baseline or {}).get('routes', {}).get(route)
+        if old and old['p99_ms'] and row['p99_ms'] is not None:
+            print(f"{'':<14} p99 vs. baseline: {_change(row['p99_ms'], old['p99_ms'])}")
+    print("commands: " + ", ".join(f"{k}={v}" for k, v in sorted(summary['commands'].items())))
+
+
+def _change(new, old):
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Virtual-player load test for the backend")
+    parser.add_argument('--players', type=int, default=20)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--fps', type=float, default=60,
+                        help="polls per second per player (0 = as fast as possible)")
+    parser.add_argument('--url', help="test a running server (default: in-process test client)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tutorial', action='store_true', help="unlimited mana for every player")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--baseline', help="results file from an earlier run to compare against")
+    args = parser.parse_args()
+
+    summary = run(args.players, args.seconds, args.fps, args.url, args.seed, args.tutorial)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    print_summary(summary, baseline)
+
+    if args.json:
+        config = {k: getattr(args, k) for k in ('players', 'seconds', 'fps', 'url', 'seed', 'tutorial')}
+        with open(args.json, 'w') as f:
+            json.dump({'config': config, 'results': summary}, f, indent=2)
@@ -0,0 +1,120 @@
+"""
+ROI Crop Benchmark
+==================
+What cropping around the hands saves MediaPipe per frame.
+
+Without --source: color conversion plus MediaPipe Hands on a synthetic
+frame (no hand in it, so palm detection runs every frame) against the
+same on a centred square crop, at several camera resolutions. With
+--source: whole MLGestureRecognizer frames (detection and classification)
+over a video, with the ROI tracker on and off, plus how often it cropped.
+
+Needs OpenCV and MediaPipe.
+
+Usage:
+    python benchmarks/bench_roi.py [--frames 200] [--json out.json]
+    python benchmarks/bench_roi.py --source clip.mp4 [--hands 1]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND_DIR, os.path.join(BACKEND_DIR, 'models')]
+
+import archmage_cv_ml  # noqa: E402
+import gamelog  # noqa: E402
+
+# (width, height, crop side): a hand's crop is about this big at each resolution
+RESOLUTIONS = [(640, 480, 240), (1280, 720, 400), (1920, 1080, 600)]
+WARM_UP_FRAMES = 10
+
+
+def per_frame_ms(hands, image, frames):
+    cv2 = archmage_cv_ml.cv2
+    for _ in range(WARM_UP_FRAMES):
+        hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    start = time.perf_counter()
+    for _ in range(frames):
+        hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def synthetic(frames):
+    cv2 = archmage_cv_ml.cv2
+    rng = np.random.default_rng(0)
+    recognizer = archmage_cv_ml.MLGestureRecognizer()
+    results = []
+    for width, height, side in RESOLUTIONS:
+        frame = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (31, 31), 0)
+        y0, x0 = (height - side) // 2, (width - side) // 2
+        full = per_frame_ms(recognizer.hands, frame, frames)
+        crop = per_frame_ms(recognizer.crop_hands, np.ascontiguousarray(frame[y0:y0 + side, x0:x0 + side]), frames)
+        results.append({'width': width, 'height': height, 'crop': side,
+                        'full_ms': full, 'crop_ms': crop})
+    recognizer.close()
+    return results
+
+
+def from_source(source, frames, max_hands):
+    cv2 = archmage_cv_ml.cv2
+    capture = cv2.VideoCapture(source)
+    images = []
+    while len(images) < frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        images.append(frame)
+    capture.release()
+    if not images:
+        raise SystemExit(f"could not read frames from {source!r}")
+
+    results = []
+    for track in (False, True):
+        recognizer = archmage_cv_ml.MLGestureRecognizer(max_hands=max_hands, track=track, target_fps=None)
+        recognizer.warm_up()
+        start = time.perf_counter()
+        for image in images:
+            recognizer.process_frame(image)
+        elapsed = time.perf_counter() - start
+        results.append({'track': track, 'frames': len(images),
+                        'per_frame_ms': elapsed / len(images) * 1000,
+                        'tracking': recognizer.tracking_stats()})
+        recognizer.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="MediaPipe time per frame, whole frame vs. ROI crop")
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--source', help="video file to run the whole recognizer over")
+    parser.add_argument('--hands', type=int, default=2, help="max_hands for --source")
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    gamelog.set_level('WARNING')
+    archmage_cv_ml._import_cv()
+
+    if args.source:
+        results = from_source(args.source, args.frames, args.hands)
+        print(f"{'tracking':>8} {'ms/frame':>9} {'crops':>6}")
+        for row in results:
+            print(f"{'on' if row['track'] else 'off':>8} {row['per_frame_ms']:>9.2f} "
+                  f"{row['tracking'].get('tracked', 0):>6}")
+    else:
+        results = synthetic(args.frames)
+        print(f"{'frame':>10} {'crop':>5} {'full ms':>8} {'crop ms':>8} {'saved':>6}")
+        for row in results:
+            print(f"{row['width']:>5}x{row['height']:<4} {row['crop']:>5} {row['full_ms']:>8.2f} "
+                  f"{row['crop_ms']:>8.2f} {1 - row['crop_ms'] / row['full_ms']:>6.0%}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'source': args.source, 'results': results}, f, indent=2)
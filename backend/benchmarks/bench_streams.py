@@ -0,0 +1,64 @@
+"""
+Multi-Stream Benchmark
+======================
+Recognized frames per second with 1, 2, 4... streams of the same source,
+each in its own StreamManager worker process. With enough cores the total
+should grow close to linearly; per-stream rates falling means the streams
+are contending for CPU.
+
+Needs OpenCV, MediaPipe and a source every worker can open at once: a
+video file is best (a camera can usually only be opened by one process).
+
+Usage:
+    python benchmarks/bench_streams.py --source clip.mp4 --streams 1 2 4 [--seconds 10] [--pin]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND_DIR, os.path.join(BACKEND_DIR, 'models')]
+
+import gamelog  # noqa: E402
+from streams import StreamManager  # noqa: E402
+
+
+def measure(source, streams, seconds, pin=False):
+    with StreamManager([source] * streams, pin=pin) as manager:
+        # Let every worker warm up before counting
+        deadline = time.time() + 60
+        while time.time() < deadline and not all(s['results'] for s in manager.stats()):
+            time.sleep(0.1)
+        before = [s['results'] for s in manager.stats()]
+        time.sleep(seconds)
+        after = [s['results'] for s in manager.stats()]
+    per_stream = [(b - a) / seconds for a, b in zip(before, after)]
+    return {'streams': streams, 'total_fps': sum(per_stream), 'per_stream_fps': per_stream}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gesture recognition throughput vs stream count")
+    parser.add_argument('--source', required=True, help="video file (or camera index) for every stream")
+    parser.add_argument('--streams', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--pin', action='store_true', help="pin each worker to its own CPU")
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    gamelog.set_level('WARNING')
+    source = int(args.source) if args.source.isdigit() else args.source
+    results = [measure(source, n, args.seconds, args.pin) for n in args.streams]
+
+    print(f"{'streams':>7} {'total fps':>10} {'per stream':>11} {'scaling':>8}")
+    base = results[0]['total_fps'] / results[0]['streams'] if results[0]['total_fps'] else None
+    for row in results:
+        scaling = row['total_fps'] / base / row['streams'] if base else 0.0
+        print(f"{row['streams']:>7} {row['total_fps']:>10.1f} "
+              f"{row['total_fps'] / row['streams']:>11.1f} {scaling:>7.0%}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'source': args.source, 'cpus': os.cpu_count(), 'results': results}, f, indent=2)
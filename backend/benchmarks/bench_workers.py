@@ -0,0 +1,110 @@
+"""
+Worker Scaling Benchmark
+========================
+Measures backend throughput (requests/second) as the number of worker
+processes in run_workers.py grows, on one machine.
+
+Each client process plays one session: it alternates gestures through
+/set_gesture and polls /get_command over a keep-alive connection as fast as
+the server answers. Every request also makes one call to the single state
+server process, so throughput can stop growing once that process is busy,
+however many workers and cores there are.
+
+Usage:
+    python benchmarks/bench_workers.py --workers 1 2 4 --clients 8 --seconds 5
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import gamelog  # noqa: E402
+import run_workers  # noqa: E402
+
+GESTURES = ["OPEN_PALM", "FIST", "POINT", "FIST", "NONE"]
+
+
+def _client(port, session_id, seconds, results):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.connect()
+    # http.client sends headers and body separately; don't let Nagle stall them
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    headers = {'Content-Type': 'application/json'}
+    requests = 0
+    i = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        body = json.dumps({'gesture': GESTURES[i % len(GESTURES)]})
+        conn.request('POST', f'/set_gesture?session_id={session_id}', body, headers)
+        conn.getresponse().read()
+        conn.request('GET', f'/get_command?session_id={session_id}')
+        conn.getresponse().read()
+        requests += 2
+        i += 1
+    conn.close()
+    results.put(requests)
+
+
+def wait_until_ready(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/get_command?session_id=warmup')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("workers did not come up")
+
+
+def measure(workers, clients, seconds, port):
+    state_process, processes = run_workers.start_workers(workers, port=port)
+    try:
+        wait_until_ready(port)
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_client, args=(port, f"bench-{i}", seconds, results))
+                 for i in range(clients)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        total = sum(results.get() for _ in procs)
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        run_workers.stop_workers(state_process, processes)
+    return total / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backend throughput vs. worker count")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--port', type=int, default=5101)
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    # Per-command log lines from the state server would bury the results;
+    # the forked workers and state server inherit the level
+    gamelog.set_level('WARNING')
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8}")
+    rows = []
+    for i, workers in enumerate(args.workers):
+        # A fresh port per run avoids TIME_WAIT clashes
+        rate = measure(workers, args.clients, args.seconds, args.port + i)
+        rows.append({'workers': workers, 'requests_per_second': rate})
+        print(f"{workers:>8} {rate:>10.0f} {rate / rows[0]['requests_per_second']:>7.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'clients': args.clients, 'seconds': args.seconds, 'results': rows}, f, indent=2)
@@ -0,0 +1,96 @@
+"""
+Combo Engine
+============
+Every castable spell is declared once in SPELLS: the gesture sequence that
+casts it, its mana cost, how many combo points it is worth and an optional
+time window. ComboEngine compiles the table into a trie keyed on the gesture
+sequence read newest-first, so matching a new gesture is a short walk back
+through a bounded history of the player's previous gestures.
+
+Adding a combo is a one-line change to SPELLS; mana costs, spell stats and
+display names are all derived from it.
+"""
+
+from collections import deque, namedtuple
+
+# gestures: sequence of distinct consecutive gestures, oldest first
+# window:   max seconds between the first gesture and the last (None = no limit)
+Spell = namedtuple("Spell", "name display_name gestures mana_cost combo_points window")
+
+SPELLS = (
+    Spell("FIREBALL", "Fireball", ("FIST",), 20, 1, None),
+    Spell("ICE_SHARD", "Ice Shard", ("OPEN_PALM",), 15, 1, None),
+    Spell("LIGHTNING", "Lightning", ("POINT",), 25, 1, None),
+    Spell("EXPLOSION_COMBO", "Explosion Combo", ("OPEN_PALM", "FIST"), 35, 2, None),
+    Spell("HEALING_LIGHT_COMBO", "Healing Light Combo", ("OPEN_PALM", "POINT"), 30, 2, None),
+    Spell("LIGHTNING_STRIKE_COMBO", "Lightning Strike Combo", ("POINT", "FIST"), 40, 2, None),
+    # Tracked in stats but not bound to a gesture sequence yet
+    Spell("PUNCH_COMBO", "Punch Combo", (), 10, 2, None),
+)
+
+
+class _TrieNode:
+    __slots__ = ("children", "spell")
+
+    def __init__(self):
+        self.children = {}
+        self.spell = None
+
+
+class ComboEngine:
+    """Matches the newest gesture plus recent history against SPELLS.
+
+    Gesture history is a deque of (gesture, time) pairs holding the previous
+    distinct gestures (NONE included, so letting go of a pose breaks a combo).
+    Use `new_history()` to make one of the right length.
+    """
+
+    def __init__(self, spells=SPELLS):
+        self.spells = {}
+        self._root = _TrieNode()
+        longest = 1
+
+        for spell in spells:
+            if spell.name in self.spells:
+                raise ValueError(f"Duplicate spell {spell.name}")
+            self.spells[spell.name] = spell
+            if not spell.gestures:
+                continue
+
+            node = self._root
+            for gesture in reversed(spell.gestures):
+                node = node.children.setdefault(gesture, _TrieNode())
+            if node.spell is not None:
+                raise ValueError(f"{spell.name} and {node.spell.name} use the same gestures")
+            node.spell = spell
+            longest = max(longest, len(spell.gestures))
+
+        # Only the gestures *before* the newest one are kept in history
+        self.history_length = max(1, longest - 1)
+        self.mana_costs = {name: spell.mana_cost for name, spell in self.spells.items()}
+        self.display_names = {name: spell.display_name for name, spell in self.spells.items()}
+
+    def new_history(self):
+        return deque(maxlen=self.history_length)
+
+    def match(self, gesture, now, history):
+        """Return the longest Spell ending in `gesture`, or None.
+
+        Unknown gestures, including ones that aren't strings, match nothing.
+        Cost is bounded by the longest combo, not by the number of spells.
+        """
+        if not isinstance(gesture, str):
+            return None
+        node = self._root.children.get(gesture)
+        if node is None:
+            return None
+
+        best = node.spell
+        for previous, started in reversed(history):
+            node = node.children.get(previous)
+            if node is None:
+                break
+            spell = node.spell
+            if spell is not None and (spell.window is None or now - started <= spell.window):
+                best = spell
+        return best
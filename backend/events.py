@@ -0,0 +1,137 @@
+"""
+Event Scheduler
+===============
+Starts and expires the boss weakness events (WEAKFIRE, WEAKICE, ...) for
+every session at their deadlines, instead of as a side effect of polling.
+
+All pending deadlines live in one min-heap, so the scheduler thread only ever
+looks at the next transition that is due, however many sessions exist.
+Each session has at most one live entry; entries for sessions that were
+evicted or rescheduled are skipped when they come up.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+
+import gamelog
+
+log = gamelog.get_logger('events')
+
+
+class EventScheduler:
+    """Fires event start/expiry transitions for all sessions.
+
+    `rng` can be any object with a `choice()` method (e.g. random.Random(seed))
+    so event sequences are reproducible. `subscribe(callback)` registers
+    `callback(session, event)` to be called after each transition.
+    """
+
+    def __init__(self, sessions, possible_events, duration, cooldown, rng=None):
+        self.sessions = sessions
+        self.possible_events = list(possible_events)
+        self.duration = duration
+        self.cooldown = cooldown
+        self.rng = rng or random.Random()
+
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._subscribers = []
+        self._thread = None
+        self._running = False
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def add_session(self, session):
+        """Schedule the first event for a newly created session."""
+        self.schedule(session, session.last_event_end_time + self.cooldown)
+
+    def schedule(self, session, deadline):
+        session.event_deadline = deadline
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, next(self._counter), session))
+            if self._heap[0][2] is session:
+                self._cond.notify()
+
+    def next_deadline(self):
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now=None):
+        """Fire every transition whose deadline has passed.
+
+        Returns the number of transitions fired. The background thread calls
+        this; tests can call it directly with a fixed `now`.
+        """
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap))
+
+        fired = 0
+        for deadline, _, session in due:
+            if self.sessions.peek(session.session_id) is not session:
+                continue  # evicted
+            with session.lock:
+                if session.event_deadline != deadline:
+                    continue  # superseded by a newer schedule
+                event = self._transition(session, now)
+            fired += 1
+            for callback in self._subscribers:
+                callback(session, event)
+        return fired
+
+    def _transition(self, s, now):
+        if s.current_event != "NONE":
+            log.info("Event %s has EXPIRED.", s.current_event)
+            s.current_event = "NONE"
+            s.last_event_end_time = now
+            next_deadline = now + self.cooldown
+        else:
+            s.current_event = self.rng.choice(self.possible_events)
+            s.event_start_time = now
+            log.info("Event %s has STARTED!", s.current_event)
+            next_deadline = now + self.duration
+
+        s.challenge_progress = 0
+        s.challenge_target = 0
+        s.challenge_gesture = "NONE"
+        s.notify_changed()
+        self.schedule(s, next_deadline)
+        return s.current_event
+
+    def start(self):
+        """Run transitions on a background daemon thread."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="event-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - time.time()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+            self.run_due()
@@ -0,0 +1,411 @@
+"""
+Game Logic
+==========
+Sessions, spells, mana and events for the boss battle, independent of any
+web framework. server.py (Flask) and async_server.py (ASGI) are thin layers
+that parse requests, call the functions here and return their dicts as JSON.
+
+Functions taking a session lock it themselves unless their docstring says
+the caller must hold `s.lock`.
+"""
+
+import json
+import os
+import random
+import time
+
+import gamelog
+import metrics
+from combos import SPELLS, ComboEngine
+from events import EventScheduler
+from sessions import DEFAULT_SESSION_ID, SessionStore
+
+log = gamelog.get_logger('game')
+# Logged on every poll while a hand is held up, so sampled
+DETECTED_RATE = gamelog.per_second(1)
+
+ATTACK_COOLDOWN = 0
+
+MAX_MANA = 100
+MANA_REGEN_RATE = 12
+# Mana at or above this means tutorial mode: unlimited casts, no regen
+TUTORIAL_MANA = 999
+
+# Spells, combos and their mana costs are all declared in combos.SPELLS
+combo_engine = ComboEngine(SPELLS)
+MANA_COSTS = combo_engine.mana_costs
+
+EVENT_DURATION = 7
+EVENT_COOLDOWN = 10
+
+POSSIBLE_EVENTS = ["WEAKFIRE", "WEAKICE"]
+# Set ARCHMAGE_EVENT_SEED to replay the same sequence of events
+EVENT_SEED = os.environ.get('ARCHMAGE_EVENT_SEED')
+
+# /command_stream only pushes when the mana value crosses one of these buckets
+MANA_BUCKET = 5
+# Idle streams send a comment this often so dead connections get noticed
+STREAM_KEEPALIVE = 15
+# Longest a /get_command?since=<seq> request is held open
+LONG_POLL_TIMEOUT = 20
+# Most gesture transitions accepted by one /ingest_gestures request
+MAX_INGEST_BATCH = 64
+# Replayed transitions are at least this far apart (seconds), so none lands on a cooldown
+REPLAY_STEP = 0.001
+
+def create_state(rng=None):
+    """A SessionStore and the EventScheduler that runs its events.
+
+    Creating a session starts the scheduler if it isn't running (however
+    the app was launched) and schedules the session's first event.
+    """
+    store = SessionStore(MANA_COSTS, MAX_MANA, combo_engine.history_length)
+    events = EventScheduler(store, POSSIBLE_EVENTS, EVENT_DURATION, EVENT_COOLDOWN,
+                            rng=rng or random.Random(EVENT_SEED))
+
+    def schedule_first_event(session):
+        events.start()
+        events.add_session(session)
+
+    store.on_create = schedule_first_event
+    return store, events
+
+
+sessions, scheduler = create_state()
+
+# Gameplay metrics; the web servers add their own per-route ones
+game_metrics = metrics.Registry()
+game_metrics.register(metrics.Gauge(
+    'archmage_active_sessions', "Sessions currently held in memory", lambda: len(sessions)))
+COMMANDS = game_metrics.register(metrics.Counter(
+    'archmage_commands_total', "Commands emitted, including INSUFFICIENT_MANA and COOLDOWN",
+    ('command',)))
+GESTURE_TO_COMMAND = game_metrics.register(metrics.Histogram(
+    'archmage_gesture_to_command_seconds',
+    "Time from a new gesture arriving to the poll that emitted its command"))
+
+
+class BadRequest(ValueError):
+    """Raised for request bodies the routes should answer with a 400."""
+
+
+def get_session(session_id):
+    return sessions.get(str(session_id or DEFAULT_SESSION_ID))
+
+
+def set_gesture(session, gesture):
+    """Store the browser's current gesture. Raises BadRequest if it isn't a string."""
+    if not isinstance(gesture, str):
+        raise BadRequest('gesture must be a string')
+    with session.lock:
+        if gesture != session.browser_gesture:
+            session.browser_gesture = gesture
+            session.gesture_changed_at = time.time()
+            session.notify_changed()
+    return {'status': 'ok'}
+
+
+def add_mana(session, mana_amount):
+    now = time.time()
+    with session.lock:
+        current_mana = mana_at(session, now)
+        if mana_amount < 0 and current_mana >= TUTORIAL_MANA:
+            current_mana = MAX_MANA
+        else:
+            current_mana = min(MAX_MANA, max(0, current_mana + mana_amount))
+        set_mana(session, current_mana, now)
+        session.notify_changed()
+    return {'status': 'ok', 'mana': current_mana}
+
+
+def set_tutorial_mode(session):
+    with session.lock:
+        set_mana(session, TUTORIAL_MANA, time.time())
+        session.notify_changed()
+    return {'status': 'ok', 'mana': TUTORIAL_MANA}
+
+
+def reset_combo(session):
+    with session.lock:
+        session.combo_counter = 0
+        session.notify_changed()
+    return {'status': 'ok', 'combo': 0}
+
+
+def spell_stats(session):
+    with session.lock:
+        spell_usage = dict(session.spell_usage)
+
+    favorite_spell = None
+    max_usage = 0
+    for spell, count in spell_usage.items():
+        if count > max_usage:
+            max_usage = count
+            favorite_spell = spell
+
+    favorite_display = combo_engine.display_names.get(favorite_spell, "None") if favorite_spell else "None"
+
+    return {
+        'spell_usage': spell_usage,
+        'favorite_spell': favorite_spell,
+        'favorite_spell_display': favorite_display,
+        'favorite_spell_count': max_usage
+    }
+
+
+def reset_spell_stats(session):
+    with session.lock:
+        session.reset_spell_usage()
+        spell_usage = dict(session.spell_usage)
+    return {'status': 'ok', 'spell_usage': spell_usage}
+
+
+def poll_command(session):
+    """One /get_command poll: step the session and return the payload + seq.
+
+    Carries the same mana and event timestamps as /command_stream, so a
+    long-polling client can interpolate mana while it waits.
+    """
+    with session.lock:
+        payload = step_session(session)
+        payload["seq"] = session.seq
+        payload.update(stream_timestamps(session, time.time()))
+    return payload
+
+
+def ingest_gestures(session, transitions):
+    """Apply a batch of gesture transitions and return the results at once.
+
+    `transitions` is [{"gesture": "OPEN_PALM", "t": <ms>}, ...] in the order
+    they happened. Every transition runs through the combo logic, so quick
+    OPEN_PALM -> FIST switches are not lost between polls. `t` is the
+    client's clock in milliseconds; only the spacing between transitions is
+    used, anchored so the last one happened "now". Replay times still move
+    forward past the session's last cast and gesture when the client's `t`
+    values are equal, missing or out of order.
+
+    Returns the /get_command payload for the final state plus `commands`,
+    one entry per transition. Raises BadRequest for a malformed batch.
+    """
+    if (not isinstance(transitions, list) or len(transitions) > MAX_INGEST_BATCH
+            or not all(isinstance(t, dict) for t in transitions)):
+        raise BadRequest(f'transitions must be a list of at most {MAX_INGEST_BATCH}')
+    for transition in transitions:
+        if not isinstance(transition.get('gesture', 'NONE'), str):
+            raise BadRequest('gesture must be a string')
+        t = transition.get('t', 0)
+        if isinstance(t, bool) or not isinstance(t, (int, float)):
+            raise BadRequest('t must be a number of milliseconds')
+
+    now = time.time()
+    last_t = max((t.get('t', 0) for t in transitions), default=0)
+    commands = []
+    with session.lock:
+        payload = None
+        replay_time = 0
+        for transition in transitions:
+            offset = max(0.0, (last_t - transition.get('t', last_t)) / 1000.0)
+            # Strictly after the previous transition and the session's last
+            # cast, even if client timestamps are not in order
+            history = session.gesture_history
+            earliest = max(replay_time, session.last_attack_time,
+                           history[-1][1] if history else 0) + REPLAY_STEP
+            replay_time = max(earliest, now - offset)
+            gesture = transition.get('gesture', 'NONE')
+            if gesture != session.browser_gesture:
+                session.browser_gesture = gesture
+                session.gesture_changed_at = now
+                session.notify_changed()
+            payload = step_session(session, replay_time)
+            commands.append(payload["command"])
+        if payload is None:
+            payload = step_session(session, now)
+        payload["commands"] = commands
+        payload["seq"] = session.seq
+    return payload
+
+
+def stream_update(session, last_key):
+    """Step a /command_stream session and decide whether to push.
+
+    Returns (message, key, seq): `message` is the SSE text to send, or None
+    if the command, mana bucket, combo and event are all unchanged since
+    `last_key`; `seq` is the state version the stream should wait past.
+    """
+    with session.lock:
+        payload = step_session(session)
+        seen = session.seq
+        key = (payload["combo"], payload["event"],
+               int(payload["mana"] // MANA_BUCKET))
+        if payload["command"] == "NONE" and key == last_key:
+            return None, last_key, seen
+        payload["seq"] = seen
+        payload.update(stream_timestamps(session, time.time()))
+    return f"data: {json.dumps(payload)}\n\n", key, seen
+
+
+class GameService:
+    """The routes' view of the game, addressed by session id.
+
+    Every method takes a session id and returns plain JSON-able data, so the
+    same calls work in-process (server.py) or through a proxy to the shared
+    state server (state_server.py) when several worker processes serve HTTP.
+    """
+
+    def set_gesture(self, session_id, gesture):
+        return set_gesture(get_session(session_id), gesture)
+
+    def add_mana(self, session_id, amount):
+        return add_mana(get_session(session_id), amount)
+
+    def set_tutorial_mode(self, session_id):
+        return set_tutorial_mode(get_session(session_id))
+
+    def reset_combo(self, session_id):
+        return reset_combo(get_session(session_id))
+
+    def spell_stats(self, session_id):
+        return spell_stats(get_session(session_id))
+
+    def reset_spell_stats(self, session_id):
+        return reset_spell_stats(get_session(session_id))
+
+    def get_command(self, session_id, since=None):
+        """Poll, or long-poll past state version `since` (LONG_POLL_TIMEOUT)."""
+        session = get_session(session_id)
+        if since is not None:
+            with session.lock:
+                if since == session.seq:
+                    session.wait_for_change(since, LONG_POLL_TIMEOUT)
+        return poll_command(session)
+
+    def ingest_gestures(self, session_id, transitions):
+        return ingest_gestures(get_session(session_id), transitions)
+
+    def stream_update(self, session_id, last_key):
+        return stream_update(get_session(session_id), last_key)
+
+    def wait_for_change(self, session_id, seq, timeout):
+        session = get_session(session_id)
+        with session.lock:
+            return session.wait_for_change(seq, timeout)
+
+    def active_sessions(self):
+        return len(sessions)
+
+    def metrics(self):
+        """Gameplay metrics in the Prometheus text format."""
+        return game_metrics.render()
+
+
+def stream_timestamps(s, now):
+    """Deadlines the client needs to interpolate mana and events on its own."""
+    return {
+        "server_time": now,
+        "mana_updated_at": now,
+        "mana_regen_rate": 0 if s.mana_value >= TUTORIAL_MANA else MANA_REGEN_RATE,
+        "event_ends_at": s.event_deadline if s.current_event != "NONE" else None,
+        "next_event_at": s.event_deadline if s.current_event == "NONE" else None
+    }
+
+
+def mana_at(s, now):
+    """Mana at time `now`, regenerated in closed form from the stored value.
+
+    Reading never writes, so mana is exact however rarely clients poll.
+    """
+    if s.mana_value >= TUTORIAL_MANA:
+        return s.mana_value
+    elapsed = max(0.0, now - s.mana_time)
+    return min(MAX_MANA, s.mana_value + MANA_REGEN_RATE * elapsed)
+
+
+def set_mana(s, value, now):
+    """Store `value` as the mana at `now` (the caller must hold `s.lock`)."""
+    s.mana_value = value
+    # Replayed /ingest_gestures times can be older than the stored one
+    s.mana_time = max(now, s.mana_time)
+
+
+def step_session(s, now=None):
+    """Advance one session by a poll and return the /get_command payload.
+
+    `now` lets /ingest_gestures replay transitions at the time they
+    happened. The caller must hold `s.lock`.
+    """
+    now = time.time() if now is None else now
+    current_mana = mana_at(s, now)
+    
+    current_gesture = s.browser_gesture
+    
+    if current_gesture == "THUMBS_UP":
+        command = "THUMBS_UP"
+        if current_gesture != s.last_gesture:
+            s.gesture_history.append((current_gesture, now))
+        s.last_gesture = current_gesture
+        return {
+            "command": command,
+            "event": "NONE",
+            "combo": s.combo_counter,
+            "gesture": current_gesture,
+            "cooldown": 0,
+            "mana": current_mana,
+            "max_mana": MAX_MANA,
+            "challenge_progress": 0,
+            "challenge_target": 0
+        }
+    
+    if current_gesture != "NONE":
+        log.debug("🖐️  DETECTED: %s", current_gesture, extra=DETECTED_RATE)
+    
+    command = "NONE"
+    
+    if current_gesture != "NONE" and current_gesture != s.last_gesture:
+        current_time = now
+        if (current_time - s.last_attack_time) > ATTACK_COOLDOWN:
+            spell = combo_engine.match(current_gesture, current_time, s.gesture_history)
+            if spell is not None:
+                command = spell.name
+                s.combo_counter += spell.combo_points
+
+            if command != "NONE":
+                mana_cost = spell.mana_cost
+                is_tutorial_mode = current_mana >= TUTORIAL_MANA
+                if is_tutorial_mode or current_mana >= mana_cost:
+                    if not is_tutorial_mode:
+                        current_mana -= mana_cost
+                        set_mana(s, current_mana, current_time)
+                    if command in s.spell_usage:
+                        s.spell_usage[command] += 1
+                    s.last_attack_time = current_time
+                    log.info("⚡ COMMAND SENT: %s (Mana: %s/%s)", command, current_mana, MAX_MANA)
+                else:
+                    command = "INSUFFICIENT_MANA"
+                    log.info("❌ Not enough mana for %s! Need %s, have %s", spell.name, mana_cost, current_mana)
+        else:
+            log.info("Spell on cooldown...")
+            command = "COOLDOWN"
+
+    if current_gesture != s.last_gesture:
+        s.gesture_history.append((current_gesture, now))
+    s.last_gesture = current_gesture
+
+    if command != "NONE":
+        COMMANDS.labels(command).inc()
+        GESTURE_TO_COMMAND.observe(time.time() - s.gesture_changed_at)
+        s.notify_changed()
+    
+    current_time = now
+    cooldown_time = max(0, ATTACK_COOLDOWN - (current_time - s.last_attack_time))
+    
+    return {
+        "command": command, 
+        "event": s.current_event, 
+        "combo": s.combo_counter, 
+        "gesture": current_gesture,
+        "cooldown": cooldown_time,
+        "mana": current_mana,
+        "max_mana": MAX_MANA,
+        "challenge_progress": s.challenge_progress,
+        "challenge_target": s.challenge_target
+    }
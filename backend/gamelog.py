@@ -0,0 +1,153 @@
+"""
+Game Logging
+============
+Structured, non-blocking logging for the server and the CV modules.
+
+Call sites hand records to a QueueHandler; a background QueueListener does
+the formatting and the console write, so a request or camera frame never
+waits on stdout. Messages are formatted lazily (use "%s" args, not
+f-strings) and each message type is rate limited, so a line that would
+otherwise print on every poll or frame costs a dict lookup when dropped.
+
+Level: ARCHMAGE_LOG_LEVEL=DEBUG|INFO|WARNING|... (default INFO), or call
+set_level() at runtime.
+
+    log = gamelog.get_logger(__name__)
+    log.info("⚡ COMMAND SENT: %s", command)
+    log.debug("🖐️  DETECTED: %s", gesture, extra=gamelog.per_second(1))
+
+The CV modules in models/ don't import this module, so they can run on
+their own: they log to logging.getLogger('archmage.<name>') with
+extra={'rate': n}, which this module picks up once something calls
+get_logger() or set_level().
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+LOG_LEVEL = os.environ.get('ARCHMAGE_LOG_LEVEL', 'INFO').upper()
+
+# Records per second allowed through for each message type, unless the
+# call site passes its own with extra=per_second(n). Bursts up to the same
+# number are allowed.
+DEFAULT_RATE = 10
+
+_ROOT = 'archmage'
+_setup_lock = threading.Lock()
+_listener = None
+_handler = None
+_rate_filter = None
+
+
+def per_second(rate):
+    """`extra=` for a call site that should log at most `rate` times per second."""
+    return {'rate': rate}
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per message type (logger name + unformatted message).
+
+    Runs on the caller's thread before the record is queued, so dropped
+    records never reach the queue. `dropped` counts how many were dropped.
+    """
+
+    def __init__(self, default_rate=DEFAULT_RATE):
+        super().__init__()
+        self.default_rate = default_rate
+        self.dropped = 0
+        self._buckets = {}
+
+    def filter(self, record):
+        rate = getattr(record, 'rate', None)
+        if rate is None:
+            if record.levelno >= logging.WARNING:
+                return True  # warnings and errors are only limited when asked
+            rate = self.default_rate
+
+        key = (record.name, record.msg)
+        now = record.created
+        tokens, last = self._buckets.get(key, (rate, now))
+        tokens = min(rate, tokens + (now - last) * rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self.dropped += 1
+            return False
+        self._buckets[key] = (tokens - 1, now)
+        return True
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+def _setup():
+    global _listener, _handler, _rate_filter
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        records = queue.SimpleQueue()
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter('%(asctime)s %(name)s: %(message)s', '%H:%M:%S'))
+
+        _rate_filter = RateLimitFilter()
+        _handler = _LazyQueueHandler(records)
+        _handler.addFilter(_rate_filter)
+
+        root = logging.getLogger(_ROOT)
+        root.addHandler(_handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(records, console)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def _after_fork():
+    """A forked child (run_workers.py, the state server) doesn't inherit the
+    listener thread: give it its own queue and listener, keeping the level."""
+    global _listener
+    if _listener is None:
+        return
+    records = queue.SimpleQueue()
+    _handler.queue = records
+    _listener = logging.handlers.QueueListener(records, *_listener.handlers)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def get_logger(name):
+    """Logger under the shared 'archmage' hierarchy, set up on first use."""
+    _setup()
+    return logging.getLogger(f"{_ROOT}.{name}")
+
+
+def capture(name):
+    """Send another library's logger (e.g. werkzeug's access log) through the queue too."""
+    _setup()
+    logger = logging.getLogger(name)
+    logger.handlers[:] = [_handler]
+    logger.propagate = False
+
+
+def set_level(level):
+    """Change the level of every game logger at runtime ('DEBUG', logging.INFO, ...)."""
+    _setup()
+    logging.getLogger(_ROOT).setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def dropped_count():
+    """How many records the rate limits have dropped so far."""
+    return _rate_filter.dropped if _rate_filter is not None else 0
@@ -0,0 +1,208 @@
+"""
+Metrics
+=======
+Counters, gauges and fixed-bucket histograms for the /metrics endpoint,
+rendered in the Prometheus text exposition format.
+
+Recording takes no lock: every thread adds to its own shard of each
+counter or histogram, and the shards are only summed when /metrics is
+scraped. A route handler pays a thread-id dict lookup and a bisect.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers a cached poll up to a full long-poll timeout
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Shards:
+    """`size` numbers kept per thread and only added up on read."""
+
+    def __init__(self, size):
+        self.size = size
+        self._by_thread = {}
+        self._lock = threading.Lock()
+
+    def mine(self):
+        # Thread ids are reused, but never by two live threads at once
+        ident = threading.get_ident()
+        shard = self._by_thread.get(ident)
+        if shard is None:
+            shard = [0] * self.size
+            with self._lock:
+                self._by_thread[ident] = shard
+        return shard
+
+    def total(self):
+        with self._lock:
+            shards = list(self._by_thread.values())
+        totals = [0] * self.size
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _CounterChild(_Shards):
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount=1):
+        self.mine()[0] += amount
+
+
+class _HistogramChild(_Shards):
+    def __init__(self, bounds):
+        # One count per bucket, one for +Inf, then the running sum
+        super().__init__(len(bounds) + 2)
+        self.bounds = bounds
+
+    def observe(self, value):
+        shard = self.mine()
+        shard[bisect.bisect_left(self.bounds, value)] += 1
+        shard[-1] += value
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        """(name, labels, value) for every time series of this metric."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield self.name, dict(zip(self.labelnames, values)), child.total()[0]
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            totals = child.total()
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float('inf'),), totals):
+                cumulative += count
+                yield f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative
+            yield f"{self.name}_sum", labels, totals[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Gauge(_Metric):
+    """A value read from `function()` at scrape time."""
+
+    type = 'gauge'
+
+    def __init__(self, name, help, function):
+        super().__init__(name, help)
+        self.function = function
+
+    def samples(self):
+        yield self.name, {}, self.function()
+
+
+class Registry:
+    def __init__(self, *metrics):
+        self.metrics = list(metrics)
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class HttpMetrics(Registry):
+    """Per-route request counts and latency for one web server process.
+
+    Streaming routes are timed until their response starts, and long-polls
+    include the time they were held open.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.requests = self.register(Counter(
+            'archmage_http_requests_total', "HTTP requests handled",
+            ('method', 'route', 'status')))
+        self.latency = self.register(Histogram(
+            'archmage_http_request_duration_seconds', "Time spent handling HTTP requests",
+            ('method', 'route')))
+        self.register(Gauge(
+            'archmage_process_start_time_seconds', "When this server process started (for rates)",
+            lambda start=time.time(): start))
+        self.register(Gauge(
+            'archmage_process_id', "PID of the worker that answered this scrape", os.getpid))
+
+    def observe(self, method, route, status, seconds):
+        self.requests.labels(method, route, str(status)).inc()
+        self.latency.labels(method, route).observe(seconds)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
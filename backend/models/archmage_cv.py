@@ -2,6 +2,9 @@ import cv2
 import mediapipe as mp
 import time
 
+from landmarks import LandmarkBuffer
+from profiling import FrameProfiler, StageTimings
+
 # --- NEW PUNCH THRESHOLD ---
 AREA_THRESHOLD_MULTIPLIER = 1.5
 
@@ -16,8 +19,12 @@ class _GestureRecognizer: # Changed to _ to show it's "private"
         )
         
         # --- State (Memory) Variables ---
+        self.landmarks = LandmarkBuffer()
         self.last_area = 0 
         self.last_gesture = "NONE"
+        
+        # Per-stage times (profiling.StageTimings), off until enable_timings()
+        self.timings = None
 
     def _get_static_gesture(self, hand_landmarks):
         # (This helper function is unchanged)
@@ -53,25 +60,22 @@ class _GestureRecognizer: # Changed to _ to show it's "private"
         return "NONE"
 
     def _get_hand_area(self, hand_landmarks):
-        # (This helper function is unchanged)
-        landmarks = hand_landmarks.landmark
-        min_x, max_x = 1.0, 0.0
-        min_y, max_y = 1.0, 0.0
-        
-        for lm in landmarks:
-            if lm.x < min_x: min_x = lm.x
-            if lm.x > max_x: max_x = lm.x
-            if lm.y < min_y: min_y = lm.y
-            if lm.y > max_y: max_y = lm.y
-            
-        width = max_x - min_x
-        height = max_y - min_y
-        return width * height
+        # Bounding box of the landmarks, via the reusable buffer
+        return self.landmarks.fill(hand_landmarks).area()
 
     def process_frame(self, frame):
         # (This is Alan's "process" logic, slightly modified)
+        timings = self.timings
+        if timings is not None:
+            start = time.perf_counter()
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if timings is not None:
+            converted = time.perf_counter()
+            timings.record('convert', converted - start)
         results = self.hands.process(rgb_frame)
+        if timings is not None:
+            detected = time.perf_counter()
+            timings.record('hands', detected - converted)
 
         final_gesture = "NONE"
 
@@ -99,6 +103,9 @@ class _GestureRecognizer: # Changed to _ to show it's "private"
             self.last_area = 0
             self.last_gesture = "NONE"
 
+        if timings is not None:
+            # Finger rules and hand area
+            timings.record('classify', time.perf_counter() - detected)
         return final_gesture
 
 # --- THIS IS THE NEW "LIBRARY" API FOR THE SERVER ---
@@ -112,18 +119,46 @@ def get_gesture():
     This is the *only* function the server needs to call.
     It grabs one frame, processes it, and returns the gesture string.
     """
+    timings = _recognizer.timings
+    if timings is not None:
+        start = time.perf_counter()
     ret, frame = _cap.read()
     if not ret:
         return "NONE" # Camera failed
+    if timings is not None:
+        captured = time.perf_counter()
+        timings.record('capture', captured - start)
     
     # Flip the frame
     frame = cv2.flip(frame, 1)
+    if timings is not None:
+        timings.record('flip', time.perf_counter() - captured)
     
     # Process the frame and get the gesture
     gesture = _recognizer.process_frame(frame)
     
+    if timings is not None:
+        timings.frame_done()
     return gesture
 
+def enable_timings():
+    """Record how long each stage of get_gesture() takes"""
+    if _recognizer.timings is None:
+        _recognizer.timings = StageTimings()
+    return _recognizer.timings
+
+def timing_summary():
+    """FPS and mean/p50/p95/max ms for capture, flip, convert, hands and classify"""
+    return _recognizer.timings.summary() if _recognizer.timings is not None else {}
+
+def profile(frames, path=None):
+    """Run get_gesture() `frames` times under cProfile and return the pstats.Stats"""
+    profiler = FrameProfiler(frames, path)
+    for _ in range(frames):
+        profiler.run(get_gesture)
+        profiler.frame_done()
+    return profiler.stats
+
 # --- END OF "LIBRARY" API ---
 
 
@@ -5,93 +5,307 @@ This replaces the heuristic-based detection with a trained machine learning mode
 
 This file is a drop-in replacement for the gesture detection in archmage_cv.py
 After training your model, update archmage_cv.py to use this approach.
+
+Importing this module is cheap: OpenCV, MediaPipe, the camera and the model
+are all loaded on first use. To control when that happens, use a
+GestureCamera:
+
+    with GestureCamera(camera_index=0, warm_up=True) as camera:
+        gesture = camera.get_gesture()
 """
 
-import cv2
-import mediapipe as mp
+import logging
 import pickle
 import numpy as np
 import os
+import time
+from collections import namedtuple
+
+from camera import CameraStream
+from forest import FlatForest
+from landmarks import LandmarkBatch
+from pipeline import Pipeline
+from pose_cache import POSE_CACHE_SIZE, PoseCache
+from profiling import FrameProfiler, StageTimings
+from temporal import TemporalFilter
+from tracking import ResolutionGovernor, RoiTracker
+
+# The server's gamelog formats and rate limits everything under 'archmage'
+log = logging.getLogger('archmage.cv')
+# get_gesture runs once per frame, so its messages are sampled (gamelog.per_second(1))
+FRAME_RATE_LIMIT = {'rate': 1}
+# get_gesture reports NONE if the camera hasn't produced a result for this long
+RESULT_MAX_AGE = 0.5
+# Predictions below this forest vote share are reported as NONE
+CONFIDENCE_THRESHOLD = 0.4
+# How long GestureCamera(warm_up=True) waits for the first camera frame
+WARM_UP_TIMEOUT = 5.0
+# MediaPipe's input is scaled down when detection can't keep up with this
+TARGET_FPS = 30
+# How much bigger a fist's bounding box must get between frames to be a PUNCH
+AREA_THRESHOLD_MULTIPLIER = 1.5
+
+# (left hand, right hand) gestures that together make a two-hand gesture.
+# No spell uses these yet, so they are only reported in Recognition.two_hand.
+TWO_HAND_GESTURES = {
+    ("OPEN_PALM", "OPEN_PALM"): "DOUBLE_PALM",
+    ("FIST", "FIST"): "DOUBLE_FIST",
+}
+
+# One hand's gesture; handedness is MediaPipe's "Left" or "Right"
+HandGesture = namedtuple("HandGesture", "handedness gesture")
+# A frame's result: the single-hand gesture to report, every hand's own
+# gesture, and the two-hand gesture the hands make together (or "NONE")
+Recognition = namedtuple("Recognition", "gesture hands two_hand", defaults=("NONE",))
+NO_HANDS = Recognition("NONE", ())
+
+# OpenCV and MediaPipe take seconds to import; _import_cv() fills these in
+cv2 = None
+mp = None
+
+def _import_cv():
+    global cv2, mp
+    if cv2 is None:
+        import cv2 as _cv2
+        import mediapipe as _mp
+        cv2, mp = _cv2, _mp
+
+class HandState:
+    """What the recognizer remembers about one hand between frames"""
+    __slots__ = ("temporal", "last_area", "last_gesture")
+    
+    def __init__(self, smooth):
+        self.temporal = TemporalFilter() if smooth else None
+        self.last_area = 0
+        self.last_gesture = "NONE"
+
 
 class MLGestureRecognizer:
-    def __init__(self, max_hands=2, min_detect_conf=0.7):
-        # MediaPipe Setup
-        self.mp_hands = mp.solutions.hands
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=max_hands,
-            min_detection_confidence=min_detect_conf
-        )
+    def __init__(self, max_hands=2, min_detect_conf=0.7, track=True, target_fps=TARGET_FPS,
+                 smooth=True, cache_size=POSE_CACHE_SIZE, model=None):
+        # MediaPipe Hands and the model are created on first use (or by warm_up)
+        self.max_hands = max_hands
+        self.min_detect_conf = min_detect_conf
+        self._hands = None
+        # Search a crop around the hands instead of the whole frame, once
+        # all max_hands are tracked. Crops go to their own MediaPipe graph.
+        self.roi = RoiTracker() if track else None
+        self._crop_hands = None
+        # Shrink MediaPipe's input when detection is slower than target_fps
+        self.resolution = ResolutionGovernor(target_fps) if target_fps else None
         
-        # Load trained model
-        self.model = None
-        self.labels = None
-        self.load_model()
+        # `model` (a FlatForest or scikit-learn classifier) is used instead
+        # of loading the trained one from data/
+        self.model = model
+        self.labels = [str(label) for label in model.classes_] if model is not None else None
+        self._model_loaded = model is not None
+        # Stop walking the forest once the decision is certain (FlatForest
+        # only). Pays off for big batches; for one or two hands NumPy call
+        # overhead makes the plain pass faster.
+        self.early_exit = False
+        # Trees evaluated per row by the last predict_gestures call
+        self.last_trees_evaluated = []
         
-        # State variables for punch detection
-        self.last_area = 0
+        # Filled once per frame, one row per hand; the model's input and the
+        # hand areas both come from it. self.landmarks is the first hand.
+        self.batch = LandmarkBatch(max_hands)
+        self.landmarks = self.batch.hands[0]
+        # Majority vote over recent frames; skips the model while a hand holds still
+        self.smooth = smooth
+        # Model answers for recently seen hand shapes
+        self.cache = PoseCache(cache_size) if cache_size else None
+        
+        # Punch detection and smoothing state per hand, keyed by handedness
+        self.hand_states = {}
+        self.last_gesture = "NONE"
+        
+        # Per-stage timings and cProfile, off unless enable_timings()/profile() is called
+        self.timings = None
+        self.profiler = None
+    
+    @property
+    def mp_hands(self):
+        _import_cv()
+        return mp.solutions.hands
+    
+    @property
+    def mp_drawing(self):
+        _import_cv()
+        return mp.solutions.drawing_utils
+    
+    @property
+    def hands(self):
+        """MediaPipe Hands graph, built on first access"""
+        if self._hands is None:
+            self._hands = self._new_hands()
+        return self._hands
+    
+    @property
+    def crop_hands(self):
+        """MediaPipe Hands graph for ROI crops
+        
+        Its video-mode tracking only ever sees crops, and the whole-frame
+        graph's only sees whole frames.
+        """
+        if self._crop_hands is None:
+            self._crop_hands = self._new_hands()
+        return self._crop_hands
+    
+    def _new_hands(self):
+        return self.mp_hands.Hands(
+            max_num_hands=self.max_hands,
+            min_detection_confidence=self.min_detect_conf
+        )
+    
+    def warm_up(self):
+        """Load the model and build the MediaPipe graph now instead of on the first frame"""
+        self.load_model()
+        self.process_frame(np.zeros((480, 640, 3), dtype=np.uint8))
+        if self.roi is not None:
+            self.crop_hands.process(np.zeros((240, 240, 3), dtype=np.uint8))
+        self.hand_states = {}
         self.last_gesture = "NONE"
+        if self.timings is not None:
+            self.timings.reset()
+    
+    def close(self):
+        """Release the MediaPipe graphs"""
+        if self._hands is not None:
+            self._hands.close()
+            self._hands = None
+        if self._crop_hands is not None:
+            self._crop_hands.close()
+            self._crop_hands = None
         
     def load_model(self):
-        """Load the trained gesture classification model"""
+        """Load the trained gesture classification model (once)"""
+        if self._model_loaded:
+            return
+        self._model_loaded = True
+        
         # Get directory of this script and set data file paths
         script_dir = os.path.dirname(os.path.abspath(__file__))
         backend_dir = os.path.dirname(script_dir)
         data_dir = os.path.join(backend_dir, 'data')
+        forest_file = os.path.join(data_dir, 'gesture_forest.npz')
         model_file = os.path.join(data_dir, 'gesture_model.pkl')
         labels_file = os.path.join(data_dir, 'gesture_labels.pkl')
         
-        if os.path.exists(model_file) and os.path.exists(labels_file):
+        if os.path.exists(forest_file):
+            # Flattened by train_gesture_model.py; no scikit-learn needed
+            self.model = FlatForest.load(forest_file)
+            self.labels = [str(label) for label in self.model.classes_]
+            log.info("✅ Loaded gesture forest with gestures: %s", self.labels)
+        elif os.path.exists(model_file) and os.path.exists(labels_file):
             with open(model_file, 'rb') as f:
                 self.model = pickle.load(f)
             with open(labels_file, 'rb') as f:
                 self.labels = pickle.load(f)
-            print(f"✅ Loaded trained model with gestures: {self.labels}")
+            log.info("✅ Loaded trained model with gestures: %s", self.labels)
         else:
-            print(f"⚠️  Trained model not found. Please run train_gesture_model.py first.")
-            print(f"   Falling back to basic detection.")
+            log.warning("⚠️  Trained model not found. Please run train_gesture_model.py first. "
+                        "Falling back to basic detection.")
     
     def extract_landmarks(self, hand_landmarks):
-        """Extract landmark coordinates as a flat array"""
-        landmarks = []
-        for landmark in hand_landmarks.landmark:
-            landmarks.extend([landmark.x, landmark.y, landmark.z])
-        return np.array(landmarks).reshape(1, -1)
+        """Landmark coordinates as a (1, 63) float32 row
+        
+        The row lives in self.landmarks and is overwritten by the next call.
+        """
+        return self.landmarks.fill(hand_landmarks).features
     
     def _get_hand_area(self, hand_landmarks):
         """Calculate bounding box area for punch detection"""
-        landmarks = hand_landmarks.landmark
-        min_x, max_x = 1.0, 0.0
-        min_y, max_y = 1.0, 0.0
-        
-        for lm in landmarks:
-            if lm.x < min_x: min_x = lm.x
-            if lm.x > max_x: max_x = lm.x
-            if lm.y < min_y: min_y = lm.y
-            if lm.y > max_y: max_y = lm.y
-        
-        return (max_x - min_x) * (max_y - min_y)
+        return self.landmarks.fill(hand_landmarks).area()
     
     def _get_static_gesture(self, hand_landmarks):
         """Use ML model to predict static gesture"""
+        self.landmarks.fill(hand_landmarks)
+        return self._classify_slots([hand_landmarks], [0])[0]
+    
+    def _classify_slots(self, hand_landmarks, slots):
+        """Static gestures for the hands already in self.batch at `slots`
+        
+        Cache misses are classified together in one model call.
+        """
+        self.load_model()
         if self.model is None:
             # Fallback to basic heuristic
-            return self._fallback_detection(hand_landmarks)
+            return {i: self._fallback_detection(hand_landmarks[i]) for i in slots}
+        
+        gestures = {}
+        keys = {}
+        cache = self.cache
+        for i in slots:
+            if cache is not None:
+                keys[i] = cache.key(self.batch.hands[i])
+                gestures[i] = cache.get(keys[i])
+        misses = [i for i in slots if gestures.get(i) is None]
+        if not misses:
+            return gestures
         
-        # Extract landmarks and predict
-        features = self.extract_landmarks(hand_landmarks)
-        prediction = self.model.predict(features)[0]
+        rows = self.batch.rows
+        if misses[-1] - misses[0] == len(misses) - 1:
+            features = rows[misses[0]:misses[-1] + 1]  # a view, no copy
+        else:
+            features = rows[misses]
+        timings = self.timings
+        if timings is not None:
+            start = time.perf_counter()
+        predictions = self.predict_gestures(features)
+        if timings is not None:
+            timings.record('forest', time.perf_counter() - start)
+        for i, gesture in zip(misses, predictions):
+            gestures[i] = gesture
+            if cache is not None:
+                cache.put(keys[i], gesture)
+        return gestures
+    
+    def _static_gestures(self, hand_landmarks, states):
+        """Smoothed static gesture for each hand in self.batch
         
-        # Get confidence (probability)
-        probabilities = self.model.predict_proba(features)[0]
-        confidence = max(probabilities)
+        Hands whose temporal filter says nothing changed reuse their last
+        answer; the rest are classified in one batch.
+        """
+        slots = [i for i, state in enumerate(states)
+                 if state.temporal is None or state.temporal.needs_classifier(self.batch.hands[i])]
+        classified = self._classify_slots(hand_landmarks, slots) if slots else {}
         
+        gestures = []
+        for i, state in enumerate(states):
+            temporal = state.temporal
+            if temporal is None:
+                gestures.append(classified[i])
+                continue
+            if i in classified:
+                temporal.classified(self.batch.hands[i], classified[i])
+            gestures.append(temporal.vote(temporal.last_classified))
+        return gestures
+    
+    def classify_features(self, features):
+        """Labels and confidences for a batch of feature rows (n, 63)
+        
+        One predict_proba pass over the forest gives both: predict() is
+        just the argmax of the same probabilities. Works with the
+        FlatForest or a scikit-learn model.
+        """
+        probabilities = self.model.predict_proba(features)
+        best = probabilities.argmax(axis=1)
+        return self.model.classes_[best], probabilities[np.arange(len(best)), best]
+    
+    def predict_gestures(self, features):
+        """Gestures for a batch of feature rows, "NONE" where confidence is too low"""
         # Only return prediction if confidence is high enough
         # Lowered from 0.6 to 0.4 to make POINT gesture trigger more easily
-        if confidence > 0.4:
-            return prediction
-        else:
-            return "NONE"
+        if self.early_exit and isinstance(self.model, FlatForest):
+            labels, trees = self.model.decide(features, CONFIDENCE_THRESHOLD)
+            self.last_trees_evaluated = trees.tolist()
+            return [label or "NONE" for label in labels]
+        
+        labels, confidences = self.classify_features(features)
+        n_trees = getattr(self.model, 'n_trees', None) or len(self.model.estimators_)
+        self.last_trees_evaluated = [n_trees] * len(labels)
+        return [str(label) if confidence > CONFIDENCE_THRESHOLD else "NONE"
+                for label, confidence in zip(labels, confidences)]
     
     def _fallback_detection(self, hand_landmarks):
         """Fallback heuristic detection if model not available"""
@@ -112,68 +326,381 @@ class MLGestureRecognizer:
             return "BANDO"
         return "NONE"
     
-    def process_frame(self, frame):
-        """Process a single frame and return detected gesture"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb_frame)
+    def detect(self, frame):
+        """Find hand landmarks in a BGR frame (the MediaPipe half of process_frame)
         
-        final_gesture = "NONE"
+        Returns (results, crop). If the hand was found in a crop around its
+        last position, crop is that (x, y, width, height) region in
+        normalized frame coordinates and the landmarks are relative to it;
+        otherwise crop is None and the whole frame was searched.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            return profiler.run(self._detect, frame)
+        return self._detect(frame)
+    
+    def _detect(self, frame):
+        hands = self.hands
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+        box = self.roi.region(width, height) if self.roi is not None else None
         
-        if results.multi_hand_landmarks:
-            hand_landmarks = results.multi_hand_landmarks[0]
-            
-            # Get static gesture using ML model
-            static_gesture = self._get_static_gesture(hand_landmarks)
-            current_area = self._get_hand_area(hand_landmarks)
-            
-            final_gesture = static_gesture
-            
-            # Punch detection (dynamic gesture)
-            AREA_THRESHOLD_MULTIPLIER = 1.5
-            if (static_gesture == "FIST" and 
-                self.last_area > 0 and
-                current_area > (self.last_area * AREA_THRESHOLD_MULTIPLIER) and
-                self.last_gesture != "PUNCH"):
-                
-                final_gesture = "PUNCH"
-            
-            # Update state
-            if final_gesture != "PUNCH":
-                self.last_area = current_area
+        results, crop = None, None
+        if box is not None:
+            x0, y0, x1, y1 = box
+            results = self._find_hands(self.crop_hands, frame[y0:y1, x0:x1])
+            if results.multi_hand_landmarks:
+                crop = (x0 / width, y0 / height, (x1 - x0) / width, (y1 - y0) / height)
+            else:
+                # Lost the hands: look at the whole frame again
+                self.roi.miss()
+                results = None
+        if results is None:
+            results = self._find_hands(hands, frame)
+        
+        if self.resolution is not None:
+            self.resolution.observe(time.perf_counter() - start)
+        return results, crop
+    
+    def _find_hands(self, hands, image):
+        """MediaPipe on a BGR image, scaled down first if detection is behind"""
+        timings = self.timings
+        if timings is not None:
+            start = time.perf_counter()
+        if self.resolution is not None:
+            height, width = image.shape[:2]
+            scale = self.resolution.scale_for(width, height)
+            if scale < 1.0:
+                image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        if timings is None:
+            return hands.process(rgb_image)
+        
+        converted = time.perf_counter()
+        timings.record('convert', converted - start)
+        results = hands.process(rgb_image)
+        timings.record('hands', time.perf_counter() - converted)
+        return results
+    
+    def classify(self, results, crop=None):
+        """Turn MediaPipe results into a gesture, including punch detection"""
+        return self.recognize(results, crop).gesture
+    
+    def recognize(self, results, crop=None):
+        """Every hand's gesture and the one gesture to report for this frame
+        
+        All hands are classified in one batched model call, and each keeps
+        its own smoothing and punch state, keyed by handedness. The
+        reported gesture is the first hand's gesture that isn't NONE; a
+        pair from TWO_HAND_GESTURES goes in two_hand.
+        """
+        profiler = self.profiler
+        if profiler is None:
+            return self._recognize(results, crop)
+        recognition = profiler.run(self._recognize, results, crop)
+        profiler.frame_done()
+        if profiler.done.is_set():
+            self.profiler = None
+        return recognition
+    
+    def _recognize(self, results, crop):
+        timings = self.timings
+        if timings is not None:
+            start = time.perf_counter()
+        found = results.multi_hand_landmarks or []
+        n = min(len(found), self.max_hands)
+        handedness = self._handedness(results, n)
+        states = [self._hand_state(label) for label in handedness]
+        hands = self.batch.hands
+        
+        # Landmarks in whole-frame coordinates, as the model was trained on
+        for i in range(n):
+            hands[i].fill(found[i])
+            if crop is not None:
+                hands[i].to_frame(*crop)
+        if n and self.roi is not None:
+            # Short of max_hands, the whole frame is searched so the others can be found
+            self.roi.found(*self.batch.bounds(n), complete=n >= self.max_hands)
+        if timings is not None:
+            timings.record('features', time.perf_counter() - start)
+        
+        reported = []
+        if n:
+            # Get static gestures using ML model
+            static_gestures = self._static_gestures(found, states)
+            for label, state, static_gesture, hand in zip(handedness, states, static_gestures, hands):
+                gesture = self._detect_punch(state, static_gesture, hand.area())
+                reported.append(HandGesture(label, gesture))
+        
+        for label, state in self.hand_states.items():
+            if label in handedness:
+                continue
+            state.last_area = 0
+            state.last_gesture = "NONE"
+            if state.temporal is not None:
+                # A frame or two without the hand doesn't end its gesture
+                state.temporal.lost()
+                gesture = state.temporal.vote("NONE")
+                if gesture != "NONE":
+                    reported.append(HandGesture(label, gesture))
+        
+        recognition = Recognition(self._reported_gesture(reported), tuple(reported),
+                                  self._two_hand_gesture(reported))
+        self.last_gesture = recognition.gesture
+        if timings is not None:
+            timings.record('classify', time.perf_counter() - start)
+            timings.frame_done()
+        return recognition
+    
+    def _handedness(self, results, n):
+        """MediaPipe's "Left"/"Right" for the first n hands, made unique"""
+        classified = getattr(results, 'multi_handedness', None) or []
+        labels = []
+        for i in range(n):
+            label = classified[i].classification[0].label if i < len(classified) else "Unknown"
+            if label in labels:
+                # Two hands called the same: keep their states apart
+                label = f"{label}{i}"
+            labels.append(label)
+        return labels
+    
+    def _hand_state(self, label):
+        state = self.hand_states.get(label)
+        if state is None:
+            state = self.hand_states[label] = HandState(self.smooth)
+        return state
+    
+    def _detect_punch(self, state, static_gesture, current_area):
+        """PUNCH if a fist's bounding box suddenly grew, else the static gesture"""
+        final_gesture = static_gesture
+        
+        # Punch detection (dynamic gesture)
+        if (static_gesture == "FIST" and 
+            state.last_area > 0 and
+            current_area > (state.last_area * AREA_THRESHOLD_MULTIPLIER) and
+            state.last_gesture != "PUNCH"):
             
-            self.last_gesture = final_gesture
-        else:
-            self.last_area = 0
-            self.last_gesture = "NONE"
+            final_gesture = "PUNCH"
+        
+        # Update state
+        if final_gesture != "PUNCH":
+            state.last_area = current_area
         
+        state.last_gesture = final_gesture
         return final_gesture
+    
+    def _two_hand_gesture(self, hands):
+        if len(hands) < 2:
+            return "NONE"
+        by_hand = {hand.handedness: hand.gesture for hand in hands}
+        return TWO_HAND_GESTURES.get((by_hand.get("Left"), by_hand.get("Right")), "NONE")
+    
+    def _reported_gesture(self, hands):
+        for hand in hands:
+            if hand.gesture != "NONE":
+                return hand.gesture
+        return "NONE"
+    
+    def process_frame(self, frame):
+        """Process a single frame and return detected gesture"""
+        return self.classify(*self.detect(frame))
+    
+    def enable_timings(self, window=None):
+        """Start recording per-stage times; returns the StageTimings"""
+        if self.timings is None:
+            self.timings = StageTimings(window) if window else StageTimings()
+        return self.timings
+    
+    def disable_timings(self):
+        self.timings = None
+    
+    def timing_summary(self):
+        """FPS and mean/p50/p95/max milliseconds per stage, if timings are on
+        
+        Stages: capture (camera read, when run by a GestureCamera), flip,
+        convert (resize and BGR to RGB), hands (MediaPipe), features
+        (landmark buffer), forest (model call) and classify (all of
+        recognize(), forest included).
+        """
+        return self.timings.summary() if self.timings is not None else {}
+    
+    def profile(self, frames, path=None):
+        """cProfile the next `frames` recognized frames, detection included
+        
+        Returns the FrameProfiler; its wait() gives the pstats.Stats, which
+        are also written to `path` if given.
+        """
+        self.profiler = FrameProfiler(frames, path)
+        return self.profiler
+    
+    def temporal_stats(self):
+        """Classified vs skipped frames, summed over hands"""
+        totals = {'classified': 0, 'skipped': 0}
+        for state in self.hand_states.values():
+            if state.temporal is not None:
+                for name, value in state.temporal.stats().items():
+                    totals[name] += value
+        return totals
+    
+    def tracking_stats(self):
+        """Crop tracking counters and the current input scale"""
+        stats = self.roi.stats() if self.roi is not None else {}
+        if self.resolution is not None:
+            stats['scale'] = self.resolution.scale
+        return stats
 
 
-# Library API for server integration
-_cap = cv2.VideoCapture(0)
-_recognizer = MLGestureRecognizer()
+class GestureCamera:
+    """A camera plus recognizer, opened on demand and released by close().
 
-def get_gesture():
-    """Main function called by server.py"""
-    ret, frame = _cap.read()
-    if not ret:
-        print("⚠️  WARNING: Camera failed to read frame!")
-        return "NONE"
+    Creating one is free. The camera, MediaPipe graph and model are set up by
+    open(), or by the first get_gesture() call. With warm_up=True, open() also
+    loads the model, runs a blank frame through MediaPipe and waits for the
+    first camera frame, so the first get_gesture() has a real answer.
+
+    Capture, landmark detection and classification each run on their own
+    background thread, so get_gesture() never waits on the camera. Detection
+    looks at a crop around the hands while all `max_hands` are tracked,
+    and at a smaller copy of the frame when it falls behind `target_fps`.
+    
+    `camera_index` is anything cv2.VideoCapture opens: a camera number, a
+    video file or a stream URL. If given, `on_result(recognition)` is called
+    on the classify thread with every frame's Recognition. With
+    timings=True, stats() includes per-stage latencies from capture to
+    classification.
+    """
+    
+    def __init__(self, camera_index=0, warm_up=False, max_hands=2, min_detect_conf=0.7,
+                 target_fps=TARGET_FPS, on_result=None, timings=False):
+        self.camera_index = camera_index
+        self.warm_up = warm_up
+        self.recognizer = MLGestureRecognizer(max_hands, min_detect_conf, target_fps=target_fps)
+        self.on_result = on_result
+        self.timings = timings
+        self._pipeline = None
+    
+    def open(self):
+        if self._pipeline is not None:
+            return self
+        _import_cv()
+        if self.warm_up:
+            self.recognizer.warm_up()
+        timings = self.recognizer.enable_timings() if self.timings else None
+        capture = CameraStream(cv2.VideoCapture(self.camera_index), timings=timings)
+        self._pipeline = Pipeline(capture, [
+            ("detect", self._detect),
+            ("classify", self._classify),
+        ]).start()
+        if self.warm_up:
+            self._pipeline.source.wait_newer(0, timeout=WARM_UP_TIMEOUT)
+        return self
+    
+    def _detect(self, frame):
+        timings = self.recognizer.timings
+        if timings is None:
+            return self.recognizer.detect(cv2.flip(frame, 1))
+        start = time.perf_counter()
+        frame = cv2.flip(frame, 1)
+        timings.record('flip', time.perf_counter() - start)
+        return self.recognizer.detect(frame)
+    
+    def _classify(self, detection):
+        recognition = self.recognizer.recognize(*detection)
+        if self.on_result is not None:
+            self.on_result(recognition)
+        return recognition
+    
+    def close(self):
+        if self._pipeline is not None:
+            self._pipeline.stop()
+            self._pipeline = None
+        self.recognizer.close()
+    
+    def __enter__(self):
+        return self.open()
+    
+    def __exit__(self, *exc):
+        self.close()
     
-    frame = cv2.flip(frame, 1)
-    gesture = _recognizer.process_frame(frame)
+    def get_gesture(self):
+        """Gesture for the freshest camera frame, without blocking
+
+        "NONE" until the first frame has been recognized, or if the camera
+        has stopped delivering frames.
+        """
+        gesture = self.recognition().gesture
+        
+        if gesture != "NONE":
+            log.debug("👁️  Camera detected gesture: %s", gesture, extra=FRAME_RATE_LIMIT)
+        
+        return gesture
+    
+    def get_hands(self):
+        """Each visible hand's (handedness, gesture) for the freshest camera frame"""
+        return self.recognition().hands
     
-    if gesture != "NONE":
-        print(f"👁️  Camera detected gesture: {gesture}")
+    def recognition(self):
+        """The freshest Recognition, or NO_HANDS if there isn't a recent one"""
+        if self._pipeline is None:
+            self.open()
+        return self._pipeline.latest(max_age=RESULT_MAX_AGE, default=NO_HANDS)
     
-    return gesture
+    def profile(self, frames, path=None):
+        """cProfile the next `frames` frames (see MLGestureRecognizer.profile)"""
+        return self.recognizer.profile(frames, path)
+    
+    def stats(self):
+        """Queue depth, drops and time per frame for each pipeline stage, plus crop tracking"""
+        if self._pipeline is None:
+            return {}
+        stats = self._pipeline.stats()
+        stats['tracking'] = self.recognizer.tracking_stats()
+        if self.recognizer.smooth:
+            stats['temporal'] = self.recognizer.temporal_stats()
+        if self.recognizer.cache is not None:
+            stats['cache'] = self.recognizer.cache.stats()
+        if self.recognizer.timings is not None:
+            stats['timings'] = self.recognizer.timing_summary()
+        return stats
+
+
+# Library API for server integration
+# The default camera is opened by the first get_gesture() call
+_camera = None
+
+def get_gesture():
+    """Main function called by server.py"""
+    global _camera
+    if _camera is None:
+        _camera = GestureCamera()
+    return _camera.get_gesture()
+
+def get_hands():
+    """Each visible hand's (handedness, gesture), from the default camera"""
+    global _camera
+    if _camera is None:
+        _camera = GestureCamera()
+    return _camera.get_hands()
+
+def pipeline_stats():
+    """Queue depth, drops and time per frame for each pipeline stage"""
+    return _camera.stats() if _camera is not None else {}
+
+def release():
+    """Close the default camera opened by get_gesture()"""
+    global _camera
+    if _camera is not None:
+        _camera.close()
+        _camera = None
 
 
 # Test mode
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     print("--- ML Gesture Recognition Test ---")
     print("Press 'q' to quit")
     
+    _import_cv()
     test_recognizer = MLGestureRecognizer()
     test_cap = cv2.VideoCapture(0)
     
@@ -0,0 +1,122 @@
+"""
+Camera Capture
+==============
+Reads camera frames on a background thread and keeps only the newest one.
+
+cv2.VideoCapture.read() blocks until the driver has a frame and returns the
+oldest one it has buffered, so a loop that reads a frame and then spends
+30 ms on MediaPipe falls further and further behind the camera.
+CameraStream reads continuously instead. Each frame replaces the previous
+one, and readers always get the freshest frame without waiting on camera I/O.
+
+A CameraStream is also the capture stage of a pipeline.Pipeline: get()
+hands each new frame to the next stage at most once, like a queue of size
+one that drops the oldest frame.
+"""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger('archmage.camera')
+
+# Pause after a failed read so a missing camera doesn't spin a core
+FAILED_READ_BACKOFF = 0.05
+
+
+class CameraStream:
+    """Latest-frame wrapper around anything with cv2.VideoCapture's read()/release().
+
+    `dropped` counts frames that were replaced before anyone read them and
+    `failed` counts reads the camera could not serve.
+    """
+
+    def __init__(self, capture, name="camera", timings=None):
+        self.capture = capture
+        self.name = name
+        self.dropped = 0
+        self.failed = 0
+        # profiling.StageTimings; 'capture' includes waiting for the camera's next frame
+        self.timings = timings
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._index = 0
+        self._taken = True
+        self._running = False
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, release=True):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if release:
+            self.capture.release()
+
+    def latest(self):
+        """(index, frame) for the newest frame, or (0, None) before the first one.
+
+        `index` counts frames captured so far, so callers can tell a new
+        frame from one they already processed.
+        """
+        with self._cond:
+            self._taken = True
+            return self._index, self._frame
+
+    @property
+    def depth(self):
+        """1 if the newest frame hasn't been read yet, else 0."""
+        return 0 if self._taken else 1
+
+    def get(self, timeout=None):
+        """Next frame not yet read, or None if none arrives within `timeout`."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._taken or not self._running, timeout)
+            if self._taken:
+                return None
+            self._taken = True
+            return self._frame
+
+    def wait_newer(self, index, timeout=None):
+        """Block until a frame newer than `index` arrives; returns latest()."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._index > index or not self._running, timeout)
+            self._taken = True
+            return self._index, self._frame
+
+    def _run(self):
+        while self._running:
+            timings = self.timings
+            if timings is not None:
+                start = time.perf_counter()
+            ok, frame = self.capture.read()
+            if timings is not None:
+                timings.record('capture', time.perf_counter() - start)
+            if not ok:
+                self.failed += 1
+                log.warning("⚠️  Camera failed to read frame!", extra={'rate': 1})
+                time.sleep(FAILED_READ_BACKOFF)
+                continue
+            with self._cond:
+                if not self._taken:
+                    self.dropped += 1
+                self._frame = frame
+                self._index += 1
+                self._taken = False
+                self._cond.notify_all()
@@ -0,0 +1,159 @@
+"""
+Flat Forest
+===========
+The gesture RandomForest flattened into a handful of contiguous NumPy
+arrays, plus an evaluator that walks all of its trees in lockstep.
+
+scikit-learn's predict_proba spends most of a single-row call on input
+validation and per-tree Python dispatch. Here every tree's nodes live in
+shared arrays (feature index, threshold, left/right child, class
+distribution), and one step of the walk moves every (row, tree) pair down
+a level with a few vectorized gathers. Leaves point at themselves, so
+stepping `depth` times lands every pair on its leaf.
+
+train_gesture_model.py writes data/gesture_forest.npz with save(); the
+recognizer loads it with FlatForest.load() and needs no scikit-learn.
+Probabilities match RandomForestClassifier.predict_proba: inputs are
+compared as float32 against float64 thresholds, as in sklearn's trees.
+"""
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Trees added per round by decide() once the first majority has been evaluated
+EARLY_EXIT_CHUNK = 16
+
+
+def flatten(model):
+    """Arrays for a fitted RandomForestClassifier (duck-typed; sklearn not imported)."""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    depth = 0
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        left = tree.children_left.astype(np.int32)
+        right = tree.children_right.astype(np.int32)
+        leaf = left == -1
+        own = np.arange(n, dtype=np.int32)
+
+        feature = tree.feature.astype(np.int32)
+        threshold = tree.threshold.astype(np.float64)
+        feature[leaf] = 0
+        threshold[leaf] = np.inf
+        left = np.where(leaf, own, left) + offset
+        right = np.where(leaf, own, right) + offset
+
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+
+        features.append(feature)
+        thresholds.append(threshold)
+        lefts.append(left)
+        rights.append(right)
+        values.append(value / totals)
+        roots.append(offset)
+        depth = max(depth, tree.max_depth)
+        offset += n
+
+    return {
+        'version': np.array(FORMAT_VERSION),
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'value': np.concatenate(values),
+        'roots': np.array(roots, dtype=np.int32),
+        'depth': np.array(depth),
+        'classes': np.asarray(model.classes_).astype(str),
+    }
+
+
+def save(model, path):
+    np.savez_compressed(path, **flatten(model))
+
+
+class FlatForest:
+    """Evaluates a flattened forest; mirrors predict / predict_proba / classes_."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.classes_ = classes
+        self.n_trees = len(roots)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported forest format {int(data['version'])}")
+            return cls(data['feature'], data['threshold'], data['left'], data['right'],
+                       data['value'], data['roots'], data['depth'], data['classes'])
+
+    def leaves(self, X, roots=None):
+        """Leaf node of every tree (or of `roots`) for every row: shape (rows, trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        roots = self.roots if roots is None else roots
+        nodes = np.repeat(roots[np.newaxis, :], len(X), axis=0)
+        rows = np.arange(len(X))[:, np.newaxis]
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        return self.value[self.leaves(X)].sum(axis=1) / self.n_trees
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def decide(self, X, threshold, chunk=EARLY_EXIT_CHUNK):
+        """Thresholded predictions that stop evaluating trees once the answer is certain.
+
+        Returns (labels, trees): labels[i] is predict(X)[i] if the full
+        forest's confidence for row i is above `threshold`, else None, and
+        trees[i] is how many trees were evaluated for it.
+
+        Each tree adds at most 1 to a class's vote total, so with r trees left
+        the leader is settled once it leads the runner-up by more than r.
+        A row is decided when the leader is settled and already above the
+        threshold, or when no class could reach the threshold any more.
+        Both conditions need more than half the forest, so the first round
+        evaluates a bare majority and later rounds add `chunk` trees each.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        n_trees = self.n_trees
+        totals = np.zeros((len(X), len(self.classes_)))
+        trees = np.zeros(len(X), dtype=np.int32)
+        labels = [None] * len(X)
+
+        pending = np.arange(len(X))
+        done = 0
+        step = n_trees // 2 + 1
+        while len(pending):
+            roots = self.roots[done:done + step]
+            votes = self.value[self.leaves(X[pending], roots)].sum(axis=1)
+            totals[pending] += votes
+            done += len(roots)
+            trees[pending] = done
+            remaining = n_trees - done
+
+            current = totals[pending]
+            leader = current.argmax(axis=1)
+            top_two = np.sort(current, axis=1)[:, -2:]
+            settled = (top_two[:, 1] - top_two[:, 0] > remaining) | (remaining == 0)
+            confident = settled & (top_two[:, 1] / n_trees > threshold)
+            hopeless = (top_two[:, 1] + remaining) / n_trees <= threshold
+
+            for row, best in zip(pending[confident], leader[confident]):
+                labels[row] = str(self.classes_[best])
+            pending = pending[~(confident | hopeless | (remaining == 0))]
+            step = chunk
+        return labels, trees
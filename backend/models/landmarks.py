@@ -0,0 +1,103 @@
+"""
+Landmark Buffer
+===============
+A preallocated float32 home for one hand's 21 MediaPipe landmarks, reused
+for every frame.
+
+fill() copies the landmarks in once per frame; the classifier's feature
+row and the bounding-box area used for punch detection are both read from
+the same arrays, so the landmarks are walked once instead of twice and no
+NumPy arrays are created per frame. The feature row is float32, which is
+what the forest compares against anyway, so it is passed straight through
+without a conversion copy.
+
+LandmarkBatch holds several hands as rows of one (hands, 63) array, so
+all hands in a frame can go through the classifier in a single call.
+
+Everything here is overwritten by the next fill(): copy a feature row if
+it has to outlive the frame.
+"""
+
+import numpy as np
+
+N_LANDMARKS = 21
+
+
+class LandmarkBuffer:
+    """One hand's landmarks as (21, 3) x/y/z points and a (1, 63) feature row.
+
+    `points` can be an existing float32 (21, 3) array to fill in place.
+    """
+
+    def __init__(self, points=None):
+        if points is None:
+            points = np.zeros((N_LANDMARKS, 3), dtype=np.float32)
+        self.points = points
+        # Views of the same memory
+        self.features = self.points.reshape(1, -1)
+        self._flat = self.features[0]
+        self._xy = self.points[:, :2]
+        # Scratch space: protobuf values are gathered into a list, then
+        # copied into the array with one call
+        self._values = [0.0] * (N_LANDMARKS * 3)
+        self._low = np.zeros(2, dtype=np.float32)
+        self._high = np.zeros(2, dtype=np.float32)
+        self._scale = np.ones(3, dtype=np.float32)
+        self._offset = np.zeros(3, dtype=np.float32)
+
+    def fill(self, hand_landmarks):
+        """Copy a MediaPipe hand (anything with .landmark[i].x/.y/.z) into the buffer."""
+        values = self._values
+        i = 0
+        for landmark in hand_landmarks.landmark:
+            values[i] = landmark.x
+            values[i + 1] = landmark.y
+            values[i + 2] = landmark.z
+            i += 3
+        self._flat[:] = values
+        return self
+
+    def to_frame(self, x, y, width, height):
+        """Map landmarks found in a crop back to whole-frame coordinates.
+
+        (x, y, width, height) is the crop in normalized frame coordinates.
+        MediaPipe's z is on the same scale as x, so it is scaled by width.
+        """
+        self._scale[:] = (width, height, width)
+        self._offset[:] = (x, y, 0.0)
+        np.multiply(self.points, self._scale, out=self.points)
+        np.add(self.points, self._offset, out=self.points)
+        return self
+
+    def bounds(self):
+        """(min_x, min_y, max_x, max_y) of the hand in normalized image coordinates."""
+        self._xy.min(axis=0, out=self._low)
+        self._xy.max(axis=0, out=self._high)
+        return (float(self._low[0]), float(self._low[1]),
+                float(self._high[0]), float(self._high[1]))
+
+    def area(self):
+        """Bounding-box area of the hand in normalized image coordinates."""
+        high, low = self._high, self._low
+        self._xy.max(axis=0, out=high)
+        self._xy.min(axis=0, out=low)
+        np.subtract(high, low, out=high)
+        return float(high[0] * high[1])
+
+
+class LandmarkBatch:
+    """Up to `size` hands as the rows of one (size, 63) float32 array.
+
+    hands[i] is a LandmarkBuffer over row i, and rows[:n] is the feature
+    matrix for the first n hands.
+    """
+
+    def __init__(self, size):
+        self.rows = np.zeros((size, N_LANDMARKS * 3), dtype=np.float32)
+        self.hands = [LandmarkBuffer(row.reshape(N_LANDMARKS, 3)) for row in self.rows]
+
+    def bounds(self, n):
+        """(min_x, min_y, max_x, max_y) around the first n hands."""
+        boxes = [hand.bounds() for hand in self.hands[:n]]
+        return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+                max(box[2] for box in boxes), max(box[3] for box in boxes))
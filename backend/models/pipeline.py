@@ -0,0 +1,206 @@
+"""
+Staged Pipeline
+===============
+Runs capture → detect → classify (or any chain of stages) with one thread
+per stage, connected by small bounded queues that drop their oldest item
+when full.
+
+While MediaPipe works on frame N, the classifier can finish frame N-1 and
+the camera can deliver frame N+1, so throughput approaches the slowest
+stage instead of the sum of all of them. OpenCV and MediaPipe release the
+GIL in their native code, which is where almost all of the time goes.
+Dropping the oldest item keeps a slow stage working on fresh frames instead
+of a growing backlog.
+
+stats() reports each stage's queue depth, drops, frame count and time spent.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger('archmage.pipeline')
+
+# How long a stage waits for input before re-checking whether to stop
+POLL_INTERVAL = 0.5
+
+
+class DropOldestQueue:
+    """Bounded FIFO whose put() never blocks: when full, the oldest item is dropped."""
+
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def depth(self):
+        return len(self._items)
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Oldest item, or None if nothing arrives within `timeout` or the queue is closed."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class LatestResult:
+    """End of a pipeline: keeps only the newest output and when it arrived."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._time = 0.0
+        self.count = 0
+
+    def put(self, value):
+        with self._lock:
+            self._value = value
+            self._time = time.time()
+            self.count += 1
+
+    def get(self, max_age=None, default=None):
+        """Newest output, or `default` if there is none younger than `max_age` seconds."""
+        with self._lock:
+            if not self.count:
+                return default
+            if max_age is not None and time.time() - self._time > max_age:
+                return default
+            return self._value
+
+
+class Stage:
+    """Calls `function(item)` for every item from `inbox` and puts non-None results in `outbox`."""
+
+    def __init__(self, name, function, inbox, outbox):
+        self.name = name
+        self.function = function
+        self.inbox = inbox
+        self.outbox = outbox
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            item = self.inbox.get(timeout=POLL_INTERVAL)
+            if item is None:
+                continue
+            start = time.perf_counter()
+            try:
+                result = self.function(item)
+            except Exception:
+                # One bad frame shouldn't take the stage down for good
+                log.exception("Stage %s failed on a frame", self.name, extra={'rate': 1})
+                continue
+            finally:
+                self.busy_seconds += time.perf_counter() - start
+            self.processed += 1
+            if result is not None:
+                self.outbox.put(result)
+
+
+class Pipeline:
+    """`source` → stages → latest result.
+
+    `source` is the capture stage: an object with start()/stop() and the
+    queue interface get(timeout)/depth/dropped (camera.CameraStream).
+    `stages` is a list of (name, function) pairs; each function runs on
+    its own thread and its result feeds the next stage through a
+    DropOldestQueue of `maxsize`. A stopped pipeline can't be restarted;
+    build a new one.
+    """
+
+    def __init__(self, source, stages, maxsize=2):
+        self.source = source
+        self.result = LatestResult()
+        self.queues = []
+        self.stages = []
+
+        inbox = source
+        for i, (name, function) in enumerate(stages):
+            last = i == len(stages) - 1
+            outbox = self.result if last else DropOldestQueue(maxsize)
+            self.stages.append(Stage(name, function, inbox, outbox))
+            if not last:
+                self.queues.append(outbox)
+            inbox = outbox
+
+        self._lock = threading.Lock()
+        self._running = False
+        self._started = 0.0
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return self
+            self._running = True
+            self._started = time.time()
+        self.source.start()
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        for stage in self.stages:
+            stage.stop()
+        self.source.stop()
+        for queue in self.queues:
+            queue.close()
+        for stage in self.stages:
+            stage.join()
+
+    def latest(self, max_age=None, default=None):
+        return self.result.get(max_age, default)
+
+    def stats(self):
+        """Per stage: its input queue's depth and drops, frames done and mean time per frame."""
+        elapsed = max(time.time() - self._started, 1e-9) if self._started else 0.0
+        stats = {'capture': {'failed': getattr(self.source, 'failed', 0)}}
+        for stage in self.stages:
+            stats[stage.name] = {
+                'depth': stage.inbox.depth,
+                'dropped': stage.inbox.dropped,
+                'processed': stage.processed,
+                'mean_ms': stage.busy_seconds / stage.processed * 1000 if stage.processed else None,
+            }
+        stats['fps'] = self.result.count / elapsed if elapsed else 0.0
+        return stats
@@ -0,0 +1,79 @@
+"""
+Pose Cache
+==========
+A small LRU cache of classifier answers, keyed by a coarse description of
+the hand's shape.
+
+The key is each landmark's x/y relative to the wrist, divided by the
+hand's size and rounded down to POSE_CACHE_STEP of it, so a hand held
+still (or moved around the frame without changing shape) maps to the same
+key from frame to frame. z is left out: it is MediaPipe's noisiest
+coordinate and would make nearly every frame a miss. The key is built in
+preallocated arrays; only the bytes object used as the dict key is new.
+
+A hit means the forest isn't run at all. The price is that poses within
+one cell share an answer, including frames the forest itself would have
+flip-flopped on.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from landmarks import N_LANDMARKS
+
+POSE_CACHE_SIZE = 256
+# Cell size as a fraction of the hand's bounding box
+POSE_CACHE_STEP = 0.2
+
+
+class PoseCache:
+    """Gesture per quantized hand shape, least recently used evicted first."""
+
+    def __init__(self, maxsize=POSE_CACHE_SIZE, step=POSE_CACHE_STEP):
+        self.maxsize = maxsize
+        self.step = step
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._relative = np.zeros((N_LANDMARKS, 2), dtype=np.float32)
+        self._cells = np.zeros((N_LANDMARKS, 2), dtype=np.int8)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, landmarks):
+        """Cache key for the hand in a LandmarkBuffer."""
+        xy = landmarks.points[:, :2]
+        min_x, min_y, max_x, max_y = landmarks.bounds()
+        size = max(max_x - min_x, max_y - min_y) or 1.0
+        relative = self._relative
+        np.subtract(xy, xy[0], out=relative)
+        np.divide(relative, size * self.step, out=relative)
+        np.floor(relative, out=relative)
+        np.copyto(self._cells, relative, casting='unsafe')
+        return self._cells.tobytes()
+
+    def get(self, key):
+        """Cached gesture for `key`, or None."""
+        gesture = self._entries.get(key)
+        if gesture is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return gesture
+
+    def put(self, key, gesture):
+        self._entries[key] = gesture
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else None}
@@ -0,0 +1,126 @@
+"""
+CV Profiling
+============
+Where a frame's time goes, for the gesture recognizers.
+
+StageTimings keeps the last `window` durations of each named stage
+(capture, flip, convert, hands, features, forest, ...) and summarizes them
+as mean/p50/p95/max milliseconds, plus frames per second from when frames
+finished. Stages run on different threads; recording is a deque append,
+which needs no lock.
+
+FrameProfiler runs cProfile over the next N frames, across every thread
+that works on them (one profile per thread, merged at the end), and dumps
+the stats to a file for `python -m pstats` or snakeviz. On Python 3.12+
+only one thread can be profiled at a time, so overlapping calls on other
+threads run unprofiled.
+
+Both are off unless a recognizer is given one: the cost when disabled is
+an attribute check per stage.
+"""
+
+import cProfile
+import pstats
+import threading
+import time
+from collections import deque
+
+# Samples kept per stage
+TIMING_WINDOW = 300
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class StageTimings:
+    """Rolling per-stage durations and frame rate."""
+
+    def __init__(self, window=TIMING_WINDOW):
+        self.window = window
+        self._stages = {}
+        self._frames = deque(maxlen=window)
+
+    def record(self, stage, seconds):
+        samples = self._stages.get(stage)
+        if samples is None:
+            samples = self._stages.setdefault(stage, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def frame_done(self):
+        self._frames.append(time.perf_counter())
+
+    def fps(self):
+        frames = list(self._frames)
+        if len(frames) < 2 or frames[-1] == frames[0]:
+            return 0.0
+        return (len(frames) - 1) / (frames[-1] - frames[0])
+
+    def summary(self):
+        """{'fps': ..., 'stages': {stage: {count, mean_ms, p50_ms, p95_ms, max_ms}}}"""
+        stages = {}
+        for stage, samples in list(self._stages.items()):
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            stages[stage] = {
+                'count': len(ordered),
+                'mean_ms': sum(ordered) / len(ordered) * 1000,
+                'p50_ms': _percentile(ordered, 0.5) * 1000,
+                'p95_ms': _percentile(ordered, 0.95) * 1000,
+                'max_ms': ordered[-1] * 1000,
+            }
+        return {'fps': self.fps(), 'stages': stages}
+
+    def reset(self):
+        self._stages.clear()
+        self._frames.clear()
+
+
+class FrameProfiler:
+    """cProfile over the next `frames` frames; the stats go to `path` if given."""
+
+    def __init__(self, frames, path=None):
+        self.remaining = frames
+        self.path = path
+        self.stats = None
+        self.done = threading.Event()
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def run(self, function, *args):
+        """function(*args), profiled on this thread's profile."""
+        if self.done.is_set():
+            return function(*args)
+        ident = threading.get_ident()
+        profile = self._profiles.get(ident)
+        if profile is None:
+            profile = self._profiles.setdefault(ident, cProfile.Profile())
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: another thread's profile is running
+            return function(*args)
+        try:
+            return function(*args)
+        finally:
+            profile.disable()
+
+    def frame_done(self):
+        with self._lock:
+            if self.done.is_set():
+                return
+            self.remaining -= 1
+            if self.remaining > 0:
+                return
+            profiles = [p for p in self._profiles.values() if p.getstats()]
+            if profiles:
+                self.stats = pstats.Stats(*profiles)
+                if self.path:
+                    self.stats.dump_stats(self.path)
+            self.done.set()
+
+    def wait(self, timeout=None):
+        """Block until the frames have been profiled; returns the pstats.Stats (or None)."""
+        self.done.wait(timeout)
+        return self.stats
@@ -0,0 +1,154 @@
+"""
+Stream Manager
+==============
+Recognizes gestures from several cameras or videos at once, one worker
+process per source.
+
+Each worker owns a GestureCamera: its own capture, MediaPipe Hands graph
+and model, so streams share nothing and never wait on each other's GIL.
+Workers send every frame's Recognition, tagged with the stream number,
+through one multiprocessing queue; a thread in the parent keeps the
+newest result per stream, and get_gesture(stream) reads it without
+blocking. With pin=True each worker is pinned to its own CPU (Linux).
+
+Workers are spawned, not forked: OpenCV and MediaPipe start threads that
+don't survive a fork.
+
+    with StreamManager([0, 1, 'station3.mp4']) as streams:
+        gesture = streams.get_gesture(0)
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+
+from archmage_cv_ml import NO_HANDS, RESULT_MAX_AGE, GestureCamera
+from pipeline import LatestResult
+
+log = logging.getLogger('archmage.streams')
+
+# How often workers send their pipeline stats
+STATS_INTERVAL = 1.0
+# How long stop() waits for a worker before terminating it
+STOP_TIMEOUT = 5.0
+
+
+def run_stream(stream, source, channel, stop, options):
+    """Worker process: recognize `source` until `stop` is set.
+
+    Sends (stream, 'result', Recognition) for every frame and
+    (stream, 'stats', dict) every STATS_INTERVAL.
+    """
+    def publish(recognition):
+        channel.put((stream, 'result', recognition))
+
+    with GestureCamera(source, warm_up=True, on_result=publish, **options) as camera:
+        while not stop.wait(STATS_INTERVAL):
+            channel.put((stream, 'stats', camera.stats()))
+
+
+def _worker(target, stream, source, channel, stop, options, cpu):
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    try:
+        target(stream, source, channel, stop, options)
+    except Exception:
+        log.exception("Stream %d (%r) failed", stream, source)
+
+
+class StreamManager:
+    """Several sources, each recognized in its own worker process.
+
+    `sources` are anything GestureCamera accepts as camera_index; the
+    remaining keyword arguments go to every worker's GestureCamera.
+    `target` is the worker function (run_stream).
+    """
+
+    def __init__(self, sources, pin=False, target=run_stream, **options):
+        self.sources = list(sources)
+        self.pin = pin
+        self.target = target
+        self.options = options
+        self._context = multiprocessing.get_context('spawn')
+        self._results = [LatestResult() for _ in self.sources]
+        self._stats = [{} for _ in self.sources]
+        self._processes = []
+        self._channel = None
+        self._stop = None
+        self._collector = None
+
+    @property
+    def running(self):
+        return bool(self._processes)
+
+    def start(self):
+        if self._processes:
+            return self
+        context = self._context
+        self._channel = context.Queue()
+        self._stop = context.Event()
+        cpus = sorted(os.sched_getaffinity(0)) if self.pin and hasattr(os, 'sched_getaffinity') else None
+
+        for stream, source in enumerate(self.sources):
+            cpu = cpus[stream % len(cpus)] if cpus else None
+            process = context.Process(target=_worker, name=f"archmage-stream-{stream}",
+                                      args=(self.target, stream, source, self._channel,
+                                            self._stop, self.options, cpu),
+                                      daemon=True)
+            process.start()
+            self._processes.append(process)
+
+        self._collector = threading.Thread(target=self._collect, name="stream-collector", daemon=True)
+        self._collector.start()
+        log.info("Started %d gesture streams", len(self._processes))
+        return self
+
+    def stop(self):
+        if not self._processes:
+            return
+        self._stop.set()
+        # The collector keeps draining the queue meanwhile, so workers can flush and exit
+        for process in self._processes:
+            process.join(STOP_TIMEOUT)
+            if process.is_alive():
+                log.warning("Stream worker %s didn't stop; terminating it", process.name)
+                process.terminate()
+                process.join()
+        self._channel.put(None)
+        self._collector.join()
+        self._channel.close()
+        self._processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def recognition(self, stream):
+        """The freshest Recognition from `stream`, or NO_HANDS if there isn't a recent one"""
+        return self._results[stream].get(max_age=RESULT_MAX_AGE, default=NO_HANDS)
+
+    def get_gesture(self, stream):
+        return self.recognition(stream).gesture
+
+    def get_hands(self, stream):
+        return self.recognition(stream).hands
+
+    def stats(self):
+        """Per stream: whether its worker is alive, results received and its pipeline stats"""
+        return [dict(self._stats[stream], alive=process.is_alive(),
+                     results=self._results[stream].count)
+                for stream, process in enumerate(self._processes)]
+
+    def _collect(self):
+        while True:
+            message = self._channel.get()
+            if message is None:
+                return
+            stream, kind, payload = message
+            if kind == 'result':
+                self._results[stream].put(payload)
+            else:
+                self._stats[stream] = payload
@@ -0,0 +1,110 @@
+"""
+Temporal Filter
+===============
+Steadies the per-frame static gesture and skips the classifier on frames
+where nothing has changed.
+
+Smoothing: the last SMOOTHING_WINDOW per-frame gestures are kept in a
+ring, and the reported gesture only changes once a different one has
+SMOOTHING_VOTES of them. A single misclassified frame can't flip the
+gesture (and fire a spell); a real change shows up after a couple of
+frames.
+
+Skipping: while the window is unanimous and no landmark has moved more
+than MOTION_THRESHOLD of the hand's size since the last classified frame,
+the classifier's previous answer is reused and it only runs on every
+STABLE_CLASSIFY_EVERY-th frame. Any movement brings back full rate.
+Landmark motion is checked in place against a preallocated copy, so a
+skipped frame costs a couple of small NumPy calls instead of a forest pass.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from landmarks import N_LANDMARKS
+
+SMOOTHING_WINDOW = 5
+SMOOTHING_VOTES = 3
+STABLE_CLASSIFY_EVERY = 3
+# Largest landmark move, as a fraction of the hand's bounding box, that counts as still
+MOTION_THRESHOLD = 0.05
+
+
+class TemporalFilter:
+    """Majority-vote smoothing plus motion-gated classification for one hand."""
+
+    def __init__(self, window=SMOOTHING_WINDOW, votes=SMOOTHING_VOTES,
+                 stable_every=STABLE_CLASSIFY_EVERY, motion_threshold=MOTION_THRESHOLD):
+        self.votes = votes
+        self.stable_every = stable_every
+        self.motion_threshold = motion_threshold
+        self.current = "NONE"
+        self._recent = deque(maxlen=window)
+        self._counts = {}
+
+        # The landmarks the classifier last saw, and what it said
+        self.last_classified = "NONE"
+        self._reference = np.zeros((N_LANDMARKS, 2), dtype=np.float32)
+        self._diff = np.zeros((N_LANDMARKS, 2), dtype=np.float32)
+        self._has_reference = False
+        self._tolerance = 0.0
+        self._since_classified = 0
+
+        self.classified_frames = 0
+        self.skipped_frames = 0
+
+    @property
+    def stable(self):
+        """True when every gesture in a full window agrees with the current one."""
+        recent = self._recent
+        return len(recent) == recent.maxlen and self._counts.get(self.current, 0) == len(recent)
+
+    def needs_classifier(self, landmarks):
+        """Whether this frame's landmarks (a LandmarkBuffer) have to be classified."""
+        if (self._has_reference and self.stable and
+                self._since_classified + 1 < self.stable_every and not self._moved(landmarks)):
+            self._since_classified += 1
+            self.skipped_frames += 1
+            return False
+        return True
+
+    def classified(self, landmarks, gesture):
+        """Remember the landmarks the classifier just labelled as `gesture`."""
+        self._reference[:] = landmarks.points[:, :2]
+        min_x, min_y, max_x, max_y = landmarks.bounds()
+        self._tolerance = self.motion_threshold * max(max_x - min_x, max_y - min_y)
+        self._has_reference = True
+        self._since_classified = 0
+        self.last_classified = gesture
+        self.classified_frames += 1
+
+    def lost(self):
+        """No hand this frame: the next one has to be classified."""
+        self._has_reference = False
+
+    def vote(self, gesture):
+        """Add this frame's gesture; returns the smoothed gesture."""
+        recent, counts = self._recent, self._counts
+        if len(recent) == recent.maxlen:
+            counts[recent[0]] -= 1
+        recent.append(gesture)
+        counts[gesture] = counts.get(gesture, 0) + 1
+        if gesture != self.current and counts[gesture] >= self.votes:
+            self.current = gesture
+        return self.current
+
+    def reset(self):
+        self.current = "NONE"
+        self._recent.clear()
+        self._counts.clear()
+        self._has_reference = False
+
+    def stats(self):
+        return {'classified': self.classified_frames, 'skipped': self.skipped_frames}
+
+    def _moved(self, landmarks):
+        diff = self._diff
+        np.subtract(landmarks.points[:, :2], self._reference, out=diff)
+        np.abs(diff, out=diff)
+        return diff.max() > self._tolerance
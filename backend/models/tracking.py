@@ -0,0 +1,157 @@
+"""
+Hand Tracking
+=============
+Shrinks what MediaPipe has to look at on each frame.
+
+RoiTracker remembers where the hands were and hands out a padded crop
+around them for the next frame, so color conversion, resizing and palm
+detection only touch that region. The crop stays put while the hands move
+around inside it, and moves only when a hand nears its edge or changes
+size a lot. It is only used while every hand the caller looks for is
+tracked: with a hand missing, or none found in the crop, the whole frame
+is searched again so a hand can't appear unseen outside the crop. The
+caller feeds crops and whole frames to separate MediaPipe graphs, so
+neither graph's frame-to-frame tracking sees the input jump between them.
+
+The gain is modest. With no hand in view (palm detection on every frame),
+MediaPipe plus color conversion took about 7.2 ms per 640x480 frame and
+1% less on a 240px crop; 3-5% less at 1280x720 and 5-8% less at
+1920x1080 (two runs of benchmarks/bench_roi.py, one CPU core). MediaPipe
+scales every input down to its model size, so a crop mostly saves
+conversion and copying on large frames. `bench_roi.py --source` times
+whole recognizer frames with tracking on and off.
+
+ResolutionGovernor scales MediaPipe's input down when detection takes
+longer than a target frame rate allows, and back up when there is room.
+
+Both work in normalized image coordinates (0..1) and need no OpenCV.
+"""
+
+import threading
+
+# Crop side = hand's longer side * (1 + 2 * ROI_PADDING)
+ROI_PADDING = 0.6
+# Move the crop once the hand comes this close to its edge (fraction of the crop side)
+ROI_EDGE_MARGIN = 0.08
+# ...or once the hand shrinks below this fraction of the crop side
+ROI_MIN_FILL = 0.25
+# Don't bother cropping when the crop would cover this much of the frame
+ROI_MAX_COVERAGE = 0.7
+
+# Scale MediaPipe's input down when detection takes more than the frame budget,
+# back up when it takes less than RESOLUTION_HEADROOM of it
+RESOLUTION_HEADROOM = 0.6
+RESOLUTION_STEP = 0.1
+MIN_RESOLUTION_SCALE = 0.4
+# Never shrink the image's short side below this (MediaPipe's palm model is 192px)
+MIN_INPUT_PIXELS = 192
+
+
+class RoiTracker:
+    """Padded region around the last known hands, in pixels of the next frame.
+
+    Detection (region, miss) and classification (found) run on different
+    pipeline threads, so every method takes the tracker's lock.
+    """
+
+    def __init__(self, padding=ROI_PADDING):
+        self.padding = padding
+        self._crop = None  # (x0, y0, x1, y1), normalized
+        self._frame_size = None
+        self._lock = threading.Lock()
+        self.tracked = 0
+        self.lost = 0
+
+    def region(self, width, height):
+        """(x0, y0, x1, y1) pixel box to search, or None for the whole frame."""
+        with self._lock:
+            self._frame_size = (width, height)
+            crop = self._crop
+        if crop is None:
+            return None
+        x0, y0, x1, y1 = crop
+        return (int(x0 * width), int(y0 * height),
+                int(round(x1 * width)), int(round(y1 * height)))
+
+    def found(self, min_x, min_y, max_x, max_y, complete=True):
+        """The hands' bounds (normalized, whole frame) on the frame just processed.
+
+        `complete` is False when fewer hands were found than are looked
+        for; the crop is dropped until they all are.
+        """
+        with self._lock:
+            if self._frame_size is None:
+                return
+            if not complete:
+                self._crop = None
+                return
+            width, height = self._frame_size
+            crop = self._crop
+            if crop is not None:
+                self.tracked += 1
+                # Margins in normalized units per axis; the crop is square in pixels
+                side = (crop[2] - crop[0]) * width
+                margin_x = ROI_EDGE_MARGIN * side / width
+                margin_y = ROI_EDGE_MARGIN * side / height
+                hand = max((max_x - min_x) * width, (max_y - min_y) * height)
+                inside = (min_x - crop[0] >= margin_x and crop[2] - max_x >= margin_x and
+                          min_y - crop[1] >= margin_y and crop[3] - max_y >= margin_y)
+                if inside and hand >= ROI_MIN_FILL * side:
+                    return
+            self._crop = self._around(min_x, min_y, max_x, max_y, width, height)
+
+    def miss(self):
+        """The hands weren't in the crop: search the whole frame from now on."""
+        with self._lock:
+            if self._crop is not None:
+                self.lost += 1
+                self._crop = None
+
+    def _around(self, min_x, min_y, max_x, max_y, width, height):
+        # A square in pixels, centred on the hands and kept inside the frame
+        hand = max((max_x - min_x) * width, (max_y - min_y) * height)
+        side = min(hand * (1 + 2 * self.padding), width, height)
+        if side * side >= ROI_MAX_COVERAGE * width * height:
+            return None
+        cx = (min_x + max_x) / 2 * width
+        cy = (min_y + max_y) / 2 * height
+        x0 = min(max(cx - side / 2, 0.0), width - side)
+        y0 = min(max(cy - side / 2, 0.0), height - side)
+        return (x0 / width, y0 / height, (x0 + side) / width, (y0 + side) / height)
+
+    def stats(self):
+        with self._lock:
+            return {'tracked': self.tracked, 'lost': self.lost, 'cropping': self._crop is not None}
+
+
+class ResolutionGovernor:
+    """Picks an input scale so detection keeps up with `target_fps`."""
+
+    def __init__(self, target_fps, min_scale=MIN_RESOLUTION_SCALE):
+        self.budget = 1.0 / target_fps
+        self.min_scale = min_scale
+        self.scale = 1.0
+        self._mean = None
+        self._seen_first = False
+
+    def scale_for(self, width, height):
+        """Scale to apply to an image of this size (1.0 = leave it alone)."""
+        short = min(width, height)
+        if short <= MIN_INPUT_PIXELS:
+            return 1.0
+        return max(self.scale, MIN_INPUT_PIXELS / short)
+
+    def observe(self, seconds):
+        """Record how long one detection took and adjust the scale."""
+        if not self._seen_first:
+            # The first detection includes building MediaPipe's graph
+            self._seen_first = True
+            return
+        mean = seconds if self._mean is None else 0.8 * self._mean + 0.2 * seconds
+        self._mean = mean
+        if mean > self.budget and self.scale > self.min_scale:
+            self.scale = max(self.min_scale, round(self.scale - RESOLUTION_STEP, 2))
+            self._mean = None
+        elif mean < RESOLUTION_HEADROOM * self.budget and self.scale < 1.0:
+            self.scale = min(1.0, round(self.scale + RESOLUTION_STEP, 2))
+            self._mean = None
@@ -10,7 +10,11 @@ Requirements:
 Usage:
 1. Collect data using collect_gesture_data.py
 2. Run: python3 train_gesture_model.py
-3. The trained model will be saved as 'gesture_model.pkl'
+3. The trained model will be saved as 'gesture_model.pkl', and flattened
+   into 'gesture_forest.npz' for the recognizer (see forest.py)
+
+To re-export the forest from an existing gesture_model.pkl without
+retraining: python3 train_gesture_model.py --export
 """
 
 import pandas as pd
@@ -20,6 +24,29 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix
 import pickle
 import os
+import sys
+
+import forest
+
+def export_forest(model, data_dir):
+    """Flatten the forest into gesture_forest.npz, checking it still agrees with sklearn"""
+    forest_file = os.path.join(data_dir, 'gesture_forest.npz')
+    forest.save(model, forest_file)
+    
+    flat = forest.FlatForest.load(forest_file)
+    data = pd.read_csv(os.path.join(data_dir, 'gesture_training_data.csv'))
+    X = data.iloc[:, :-1].values
+    if not np.array_equal(flat.predict(X), model.predict(X)):
+        raise RuntimeError("Flattened forest disagrees with the trained model")
+    return forest_file
+
+def export_existing():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(os.path.dirname(script_dir), 'data')
+    with open(os.path.join(data_dir, 'gesture_model.pkl'), 'rb') as f:
+        model = pickle.load(f)
+    forest_file = export_forest(model, data_dir)
+    print(f"✅ Exported {len(model.estimators_)} trees to {forest_file}")
 
 def train_model():
     print("\n" + "="*60)
@@ -94,6 +121,10 @@ def train_model():
     with open(model_file, 'wb') as f:
         pickle.dump(model, f)
     
+    # Flatten for the recognizer, so it doesn't need scikit-learn
+    forest_file = export_forest(model, data_dir)
+    print(f"💾 Exported flattened forest to {forest_file}")
+    
     # Save gesture labels for reference
     labels_file = os.path.join(data_dir, 'gesture_labels.pkl')
     unique_labels = sorted(df['gesture'].unique())
@@ -104,6 +135,7 @@ def train_model():
     print("✅ TRAINING COMPLETE!")
     print("="*60)
     print(f"\nModel saved to: {model_file}")
+    print(f"Flattened forest saved to: {forest_file}")
     print(f"Labels saved to: {labels_file}")
     print(f"\nNext step: Update archmage_cv.py to use the trained model")
     print("="*60 + "\n")
@@ -111,7 +143,10 @@ def train_model():
 
 if __name__ == '__main__':
     try:
-        train_model()
+        if '--export' in sys.argv[1:]:
+            export_existing()
+        else:
+            train_model()
     except ImportError as e:
         if 'sklearn' in str(e):
             print("\n❌ scikit-learn not installed!")
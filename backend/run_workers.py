@@ -0,0 +1,93 @@
+"""
+Multi-Process Backend
+=====================
+Runs server.py in several worker processes behind one port, with all game
+sessions kept in a shared state server (state_server.py).
+
+With N workers only the HTTP side (request parsing, routing, JSON
+encoding) runs in parallel. All game logic still runs in the one state
+server process, behind a pickled call per request, so that process's GIL
+becomes the cap instead. This can only help on a machine with spare
+cores: on one core, bench_workers.py measured 1525, 1445 and 1383 req/s
+for 1, 2 and 4 workers. Multi-core numbers haven't been measured yet.
+
+Usage:
+    python run_workers.py --workers 4 --port 5001
+
+Linux/macOS only: workers are forked so they inherit the listening socket.
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+
+import state_server
+
+
+def _serve(fd, host, port, state_address, authkey):
+    os.environ['ARCHMAGE_STATE_SERVER'] = f"{state_address[0]}:{state_address[1]}"
+    os.environ['ARCHMAGE_STATE_AUTHKEY'] = authkey.hex()
+
+    import logging
+    from werkzeug.serving import make_server
+    import server
+
+    # Per-request access logs from every worker would swamp the console
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    make_server(host, port, server.app, threaded=True, fd=fd).serve_forever()
+
+
+def start_workers(workers, host='127.0.0.1', port=5001, state_address=state_server.DEFAULT_ADDRESS):
+    """Start the state server and `workers` HTTP workers sharing one socket.
+
+    Returns (state_process, processes); call `stop_workers` with them to shut down.
+    """
+    authkey = os.urandom(16)
+    state_process = state_server.start(state_address, authkey)
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(1024)
+
+    ctx = multiprocessing.get_context('fork')
+    processes = []
+    for i in range(workers):
+        process = ctx.Process(target=_serve, name=f"archmage-worker-{i}",
+                              args=(listener.fileno(), host, port, state_address, authkey),
+                              daemon=True)
+        process.start()
+        processes.append(process)
+
+    # The workers hold their own copies of the socket
+    listener.close()
+    return state_process, processes
+
+
+def stop_workers(state_process, processes):
+    for process in processes + [state_process]:
+        process.terminate()
+    for process in processes + [state_process]:
+        process.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the game backend on several processes")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    args = parser.parse_args()
+
+    print("--- CV Boss Battle Backend Server (multi-process) ---")
+    print(f"Running {args.workers} workers on http://{args.host}:{args.port}")
+    print("Press CTRL+C to stop.")
+    state_process, processes = start_workers(args.workers, args.host, args.port)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_workers(state_process, processes)
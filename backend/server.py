@@ -1,245 +1,132 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-import random
+import os
 import time
 
+import game
+import gamelog
+import metrics
+from game import STREAM_KEEPALIVE, BadRequest
+
 app = Flask(__name__)
 CORS(app)
 
-last_gesture = "NONE"
-last_gesture_time = 0
-combo_counter = 0
-browser_gesture = "NONE"
-
-spell_usage = {
-    "FIREBALL": 0,
-    "ICE_SHARD": 0,
-    "LIGHTNING": 0,
-    "EXPLOSION_COMBO": 0,
-    "HEALING_LIGHT_COMBO": 0,
-    "LIGHTNING_STRIKE_COMBO": 0,
-    "PUNCH_COMBO": 0
-}
-
-ATTACK_COOLDOWN = 0
-last_attack_time = 0
-
-MAX_MANA = 100
-current_mana = 100
-last_mana_regen_time = time.time()
-MANA_REGEN_RATE = 12
-MANA_COSTS = {
-    "FIREBALL": 20,
-    "ICE_SHARD": 15,
-    "LIGHTNING": 25,
-    "EXPLOSION_COMBO": 35,
-    "HEALING_LIGHT_COMBO": 30,
-    "LIGHTNING_STRIKE_COMBO": 40,
-    "PUNCH_COMBO": 10
-}
-
-current_event = "NONE"
-event_start_time = 0
-EVENT_DURATION = 7
-EVENT_COOLDOWN = 10
-last_event_end_time = 0
-
-POSSIBLE_EVENTS = ["WEAKFIRE", "WEAKICE"]
-
-challenge_progress = 0
-challenge_target = 0
-challenge_gesture = "NONE"
+# Werkzeug writes an access log line per request; queue and sample it like ours
+gamelog.capture('werkzeug')
+
+# Worker processes started by run_workers.py share one state server;
+# otherwise the game state lives in this process.
+if os.environ.get('ARCHMAGE_STATE_SERVER'):
+    import state_server
+    service = state_server.connect_from_env()
+else:
+    service = game.GameService()
+
+http_metrics = metrics.HttpMetrics()
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    start = g.get('request_start')
+    if start is not None:
+        # Unmatched paths share one label so scanners can't add series
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_metrics.observe(request.method, route, response.status_code, time.perf_counter() - start)
+    return response
+
+def get_session_id():
+    """Read the caller's session id from ?session_id= or the JSON body."""
+    session_id = request.args.get('session_id')
+    if not session_id:
+        data = request.get_json(silent=True) or {}
+        session_id = data.get('session_id')
+    return session_id
 
 @app.route('/set_gesture', methods=['POST'])
 def set_gesture():
-    global browser_gesture
     data = request.json
-    browser_gesture = data.get('gesture', 'NONE')
-    return jsonify({'status': 'ok'})
+    try:
+        return jsonify(service.set_gesture(get_session_id(), data.get('gesture', 'NONE')))
+    except BadRequest as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
 
 @app.route('/add_mana', methods=['POST'])
 def add_mana():
-    global current_mana
     data = request.json
-    mana_amount = data.get('amount', 30)
-    if mana_amount < 0 and current_mana >= 999:
-        current_mana = MAX_MANA
-    else:
-        current_mana = min(MAX_MANA, max(0, current_mana + mana_amount))
-    return jsonify({'status': 'ok', 'mana': current_mana})
+    return jsonify(service.add_mana(get_session_id(), data.get('amount', 30)))
 
 @app.route('/set_tutorial_mode', methods=['POST'])
 def set_tutorial_mode():
-    global current_mana
-    current_mana = 999
-    return jsonify({'status': 'ok', 'mana': current_mana})
+    return jsonify(service.set_tutorial_mode(get_session_id()))
 
 @app.route('/reset_combo', methods=['POST'])
 def reset_combo():
-    global combo_counter
-    combo_counter = 0
-    return jsonify({'status': 'ok', 'combo': combo_counter})
+    return jsonify(service.reset_combo(get_session_id()))
 
 @app.route('/get_spell_stats', methods=['GET'])
 def get_spell_stats():
-    global spell_usage
-    
-    favorite_spell = None
-    max_usage = 0
-    for spell, count in spell_usage.items():
-        if count > max_usage:
-            max_usage = count
-            favorite_spell = spell
-    
-    spell_display_names = {
-        "FIREBALL": "Fireball",
-        "ICE_SHARD": "Ice Shard",
-        "LIGHTNING": "Lightning",
-        "EXPLOSION_COMBO": "Explosion Combo",
-        "HEALING_LIGHT_COMBO": "Healing Light Combo",
-        "LIGHTNING_STRIKE_COMBO": "Lightning Strike Combo",
-        "PUNCH_COMBO": "Punch Combo"
-    }
-    
-    favorite_display = spell_display_names.get(favorite_spell, "None") if favorite_spell else "None"
-    
-    return jsonify({
-        'spell_usage': spell_usage,
-        'favorite_spell': favorite_spell,
-        'favorite_spell_display': favorite_display,
-        'favorite_spell_count': max_usage
-    })
+    return jsonify(service.spell_stats(get_session_id()))
 
 @app.route('/reset_spell_stats', methods=['POST'])
 def reset_spell_stats():
-    global spell_usage
-    spell_usage = {
-        "FIREBALL": 0,
-        "ICE_SHARD": 0,
-        "LIGHTNING": 0,
-        "EXPLOSION_COMBO": 0,
-        "HEALING_LIGHT_COMBO": 0,
-        "LIGHTNING_STRIKE_COMBO": 0,
-        "PUNCH_COMBO": 0
-    }
-    return jsonify({'status': 'ok', 'spell_usage': spell_usage})
+    return jsonify(service.reset_spell_stats(get_session_id()))
 
 @app.route('/get_command')
 def get_command():
-    global browser_gesture, current_mana, last_mana_regen_time
-    global last_gesture, combo_counter, last_attack_time
-    global current_event, event_start_time, last_event_end_time
-    global challenge_progress, challenge_target, challenge_gesture
-    
-    is_tutorial = current_mana >= 999
-    
-    if not is_tutorial:
-        current_time = time.time()
-        time_since_regen = current_time - last_mana_regen_time
-        if time_since_regen >= 0.1:
-            mana_regen = MANA_REGEN_RATE * time_since_regen
-            current_mana = min(MAX_MANA, current_mana + mana_regen)
-            last_mana_regen_time = current_time
-    
-    current_gesture = browser_gesture
-    
-    if current_gesture == "THUMBS_UP":
-        command = "THUMBS_UP"
-        last_gesture = current_gesture
-        return jsonify({
-            "command": command,
-            "event": "NONE",
-            "combo": combo_counter,
-            "gesture": current_gesture,
-            "cooldown": 0,
-            "mana": current_mana,
-            "max_mana": MAX_MANA,
-            "challenge_progress": 0,
-            "challenge_target": 0
-        })
-    
-    if current_gesture != "NONE":
-        print(f"🖐️  DETECTED: {current_gesture}")
-    
-    command = "NONE"
-    
-    if current_gesture != "NONE" and current_gesture != last_gesture:
-        current_time = time.time()
-        if (current_time - last_attack_time) > ATTACK_COOLDOWN:
-            if current_gesture == "FIST" and last_gesture == "OPEN_PALM":
-                command = "EXPLOSION_COMBO"
-                combo_counter += 2
-            elif current_gesture == "POINT" and last_gesture == "OPEN_PALM":
-                command = "HEALING_LIGHT_COMBO"
-                combo_counter += 2
-            elif current_gesture == "FIST" and last_gesture == "POINT":
-                command = "LIGHTNING_STRIKE_COMBO"
-                combo_counter += 2
-            elif current_gesture == "FIST":
-                command = "FIREBALL"
-                combo_counter += 1
-            elif current_gesture == "OPEN_PALM": 
-                command = "ICE_SHARD"
-                combo_counter += 1
-            elif current_gesture == "POINT": 
-                command = "LIGHTNING"
-                combo_counter += 1
-
-            if command != "NONE":
-                mana_cost = MANA_COSTS.get(command, 0)
-                is_tutorial_mode = current_mana >= 999
-                if is_tutorial_mode or current_mana >= mana_cost:
-                    if not is_tutorial_mode:
-                        current_mana -= mana_cost
-                    if command in spell_usage:
-                        spell_usage[command] += 1
-                    last_attack_time = current_time
-                    print(f"⚡ COMMAND SENT: {command} (Mana: {current_mana}/{MAX_MANA})")
-                else:
-                    command = "INSUFFICIENT_MANA"
-                    print(f"❌ Not enough mana for {command}! Need {mana_cost}, have {current_mana}")
-        else:
-            print("Spell on cooldown...")
-            command = "COOLDOWN"
-
-    current_time = time.time()
-
-    if current_event != "NONE":
-        if (current_time - event_start_time) > EVENT_DURATION:
-            print(f"Event {current_event} has EXPIRED.")
-            current_event = "NONE"
-            last_event_end_time = current_time
-            challenge_progress = 0
-            challenge_target = 0
-            challenge_gesture = "NONE"
-    elif (current_time - last_event_end_time) > EVENT_COOLDOWN:
-        current_event = random.choice(POSSIBLE_EVENTS)
-        event_start_time = current_time
-        print(f"Event {current_event} has STARTED!")
-        challenge_progress = 0
-        challenge_target = 0
-        challenge_gesture = "NONE"
-
-    last_gesture = current_gesture
-    
-    current_time = time.time()
-    cooldown_time = max(0, ATTACK_COOLDOWN - (current_time - last_attack_time))
-    
-    return jsonify({
-        "command": command, 
-        "event": current_event, 
-        "combo": combo_counter, 
-        "gesture": current_gesture,
-        "cooldown": cooldown_time,
-        "mana": current_mana,
-        "max_mana": MAX_MANA,
-        "challenge_progress": challenge_progress,
-        "challenge_target": challenge_target
+    """Poll for the next command.
+
+    With ?since=<seq> this becomes a long-poll: if the session's state
+    version still equals `seq`, the request is held until something changes,
+    an event starts or ends, or LONG_POLL_TIMEOUT passes.
+    """
+    since = request.args.get('since', type=int)
+    return jsonify(service.get_command(get_session_id(), since))
+
+@app.route('/ingest_gestures', methods=['POST'])
+def ingest_gestures():
+    """Apply a batch of gesture transitions (see game.ingest_gestures)."""
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(service.ingest_gestures(get_session_id(), data.get('transitions', [])))
+    except BadRequest as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/command_stream')
+def command_stream():
+    """Server-Sent Events version of /get_command.
+
+    Instead of polling every frame, the browser keeps one connection open
+    and gets a message only when the command, mana bucket, combo or event
+    changes. Mana and event deadlines are sent as server timestamps so the
+    client can interpolate between messages.
+    """
+    session_id = get_session_id()
+
+    def events():
+        last_key = None
+        while True:
+            message, last_key, seen = service.stream_update(session_id, last_key)
+            if message:
+                yield message
+            if not service.wait_for_change(session_id, seen, STREAM_KEEPALIVE):
+                yield ": keepalive\n\n"
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics: this process's routes plus the shared gameplay ones."""
+    return Response(http_metrics.render() + service.metrics(), mimetype=metrics.CONTENT_TYPE)
+
 if __name__ == '__main__':
     print("--- CV Boss Battle Backend Server ---")
     print("Running on http://localhost:5001")
-    print("Serving gesture commands at /get_command")
+    print("Serving gesture commands at /get_command and /command_stream")
     print("Press CTRL+C to stop.")
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    app.run(debug=True, port=5001, threaded=True)
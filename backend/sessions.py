@@ -0,0 +1,182 @@
+"""
+Game Sessions
+=============
+Per-player game state for server.py.
+
+Every browser (kiosk, tab, player) gets its own GameSession, keyed by the
+`session_id` it sends with each request. Sessions are created on first use
+and dropped again once they have been idle for SESSION_IDLE_TIMEOUT seconds,
+so one backend process can host many players at once.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+DEFAULT_SESSION_ID = "default"
+
+# How long a session may go without any request before it is evicted
+SESSION_IDLE_TIMEOUT = 10 * 60
+# Idle sessions are swept at most this often (seconds)
+EVICTION_INTERVAL = 30
+
+
+class GameSession:
+    """All gameplay state for a single player.
+
+    Uses __slots__ so hundreds of sessions stay small. Route handlers must
+    hold `lock` while reading or changing the fields, and call
+    `notify_changed()` after a change that clients should hear about.
+    """
+
+    __slots__ = (
+        "session_id",
+        "lock",
+        "changed",
+        "waiters",
+        "seq",
+        "last_seen",
+        "last_gesture",
+        "gesture_history",
+        "combo_counter",
+        "browser_gesture",
+        "gesture_changed_at",
+        "spell_usage",
+        "last_attack_time",
+        "mana_value",
+        "mana_time",
+        "current_event",
+        "event_start_time",
+        "last_event_end_time",
+        "event_deadline",
+        "challenge_progress",
+        "challenge_target",
+        "challenge_gesture",
+    )
+
+    def __init__(self, session_id, spells, max_mana, history_length=1, now=None):
+        now = time.time() if now is None else now
+
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        # Extra callbacks run on every change, e.g. to wake asyncio waiters
+        self.waiters = []
+        self.seq = 0
+        self.last_seen = now
+
+        self.last_gesture = "NONE"
+        # (gesture, start time) of previous distinct gestures, for combos
+        self.gesture_history = deque(maxlen=history_length)
+        self.combo_counter = 0
+        self.browser_gesture = "NONE"
+        # When browser_gesture last changed, for the gesture-to-command metric
+        self.gesture_changed_at = now
+        self.spell_usage = dict.fromkeys(spells, 0)
+
+        self.last_attack_time = 0
+
+        # Mana is stored as the value at `mana_time`; regen is applied on read
+        self.mana_value = max_mana
+        self.mana_time = now
+
+        self.current_event = "NONE"
+        self.event_start_time = 0
+        self.last_event_end_time = 0
+        # Next start/expiry time, owned by events.EventScheduler
+        self.event_deadline = None
+
+        self.challenge_progress = 0
+        self.challenge_target = 0
+        self.challenge_gesture = "NONE"
+
+    def notify_changed(self):
+        """Bump the state version and wake anyone waiting on it (hold `lock`)."""
+        self.seq += 1
+        self.changed.notify_all()
+        for wake in self.waiters:
+            wake()
+
+    def wait_for_change(self, seq, timeout):
+        """Block until the state version moves past `seq` (hold `lock`).
+
+        Returns True if it changed, False if `timeout` ran out first.
+        """
+        return self.changed.wait_for(lambda: self.seq != seq, timeout)
+
+    def reset_spell_usage(self):
+        self.spell_usage = dict.fromkeys(self.spell_usage, 0)
+
+
+class SessionStore:
+    """Thread-safe map of session id -> GameSession with idle eviction.
+
+    Sessions are kept in least-recently-used order, so sweeping idle ones
+    only ever looks at the sessions that are actually expired.
+    """
+
+    def __init__(self, spells, max_mana, history_length=1, idle_timeout=SESSION_IDLE_TIMEOUT,
+                 on_create=None):
+        self.spells = tuple(spells)
+        self.max_mana = max_mana
+        self.history_length = history_length
+        self.idle_timeout = idle_timeout
+        # Called with each new session, e.g. to schedule its first event
+        self.on_create = on_create
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_eviction = time.time()
+
+    def get(self, session_id, now=None):
+        """Return the session for `session_id`, creating it if needed."""
+        now = time.time() if now is None else now
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = GameSession(session_id, self.spells, self.max_mana,
+                                      self.history_length, now)
+                self._sessions[session_id] = session
+                if self.on_create is not None:
+                    self.on_create(session)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_seen = now
+
+            if now - self._last_eviction >= EVICTION_INTERVAL:
+                self._evict_idle(now)
+
+        return session
+
+    def peek(self, session_id):
+        """Return the session if it exists, without creating or touching it."""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def evict_idle(self, now=None):
+        """Drop every session idle for longer than `idle_timeout`.
+
+        Returns the number of sessions removed.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._evict_idle(now)
+
+    def _evict_idle(self, now):
+        self._last_eviction = now
+        cutoff = now - self.idle_timeout
+        evicted = 0
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_seen > cutoff:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
@@ -0,0 +1,164 @@
+"""
+Shared State Server
+===================
+Holds every game session for a group of worker processes.
+
+Each worker runs the normal Flask app, but instead of its own in-process
+sessions it sends game.GameService calls to this server over a local
+socket (multiprocessing.connection). All session changes still run under
+the session's lock inside this one process, so mana spends and combo
+increments stay atomic however many workers share it.
+
+Calls are pickled, so the socket always requires an authkey: a client
+without it can't connect.
+
+Usually started for you by run_workers.py. To run it by hand:
+    python state_server.py            # listens on 127.0.0.1:5002
+It uses ARCHMAGE_STATE_AUTHKEY=<hex> if set, otherwise it generates a key
+and prints it for the workers.
+"""
+
+import functools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+DEFAULT_ADDRESS = ('127.0.0.1', 5002)
+# Most connections one StateClient opens; each holds a server thread, and a
+# long-poll holds its connection for the whole wait. Further calls queue.
+MAX_CONNECTIONS = 32
+
+_service = None
+
+
+def _get_service():
+    """Create the one GameService (and start its event scheduler) on first use."""
+    global _service
+    if _service is None:
+        import game
+        game.scheduler.start()
+        _service = game.GameService()
+    return _service
+
+
+def _service_methods():
+    import game
+    return frozenset(name for name in vars(game.GameService) if not name.startswith('_'))
+
+
+def _require_authkey(authkey):
+    if not authkey:
+        raise ValueError("the state server needs an authkey")
+    return authkey
+
+
+def serve(address=DEFAULT_ADDRESS, authkey=None):
+    """Answer GameService calls forever, one thread per worker connection."""
+    _require_authkey(authkey)
+    service = _get_service()
+    methods = _service_methods()
+    listener = Listener(address, authkey=authkey)
+
+    def handle(conn):
+        try:
+            while True:
+                method, args = conn.recv()
+                try:
+                    if method not in methods:
+                        raise AttributeError(method)
+                    reply = ('ok', getattr(service, method)(*args))
+                except Exception as e:
+                    reply = ('error', e)
+                conn.send(reply)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+class StateClient:
+    """Drop-in for game.GameService that forwards every call to the server.
+
+    Thread-safe: each call borrows a connection from a pool of at most
+    `max_connections`, so a threaded worker doesn't reconnect per request;
+    when all are busy, the call waits for one to come back.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, max_connections=MAX_CONNECTIONS):
+        self.address = address
+        self.authkey = _require_authkey(authkey)
+        self._methods = _service_methods()
+        self._pool = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _call(self, method, *args):
+        with self._slots:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = Client(self.address, authkey=self.authkey)
+            try:
+                conn.send((method, args))
+                status, result = conn.recv()
+            except BaseException:
+                conn.close()
+                raise
+            self._pool.put(conn)
+        if status == 'error':
+            raise result
+        return result
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self._methods:
+            raise AttributeError(name)
+        return functools.partial(self._call, name)
+
+
+def start(address=DEFAULT_ADDRESS, authkey=None, timeout=10):
+    """Run the state server in a child process; returns once it accepts calls."""
+    _require_authkey(authkey)
+    process = multiprocessing.Process(target=serve, args=(address, authkey),
+                                      name="archmage-state", daemon=True)
+    process.start()
+
+    deadline = time.time() + timeout
+    while True:
+        try:
+            StateClient(address, authkey).active_sessions()
+            return process
+        except OSError:
+            if time.time() > deadline or not process.is_alive():
+                process.terminate()
+                raise RuntimeError(f"state server did not start on {address}")
+            time.sleep(0.05)
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(':')
+    return (host or '127.0.0.1', int(port))
+
+
+def connect_from_env():
+    """StateClient for ARCHMAGE_STATE_SERVER=host:port and ARCHMAGE_STATE_AUTHKEY=<hex>."""
+    address = parse_address(os.environ['ARCHMAGE_STATE_SERVER'])
+    authkey = os.environ.get('ARCHMAGE_STATE_AUTHKEY')
+    if not authkey:
+        raise RuntimeError("ARCHMAGE_STATE_SERVER is set but ARCHMAGE_STATE_AUTHKEY is not")
+    return StateClient(address, bytes.fromhex(authkey))
+
+
+if __name__ == '__main__':
+    authkey = os.environ.get('ARCHMAGE_STATE_AUTHKEY')
+    authkey = bytes.fromhex(authkey) if authkey else os.urandom(16)
+    print("--- Archmage Shared State Server ---")
+    print(f"Listening on {DEFAULT_ADDRESS[0]}:{DEFAULT_ADDRESS[1]}")
+    print(f"Workers need ARCHMAGE_STATE_AUTHKEY={authkey.hex()}")
+    print("Press CTRL+C to stop.")
+    serve(DEFAULT_ADDRESS, authkey)
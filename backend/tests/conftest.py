@@ -0,0 +1,49 @@
+import os
+import random
+import sys
+import time
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, BACKEND_DIR)
+# The CV helpers in models/ import each other by plain module name
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'models'))
+
+try:
+    import cv2  # noqa: F401
+except ImportError:
+    # test_camera.py is a manual hardware probe that needs OpenCV
+    collect_ignore = ["test_camera.py"]
+
+
+def _fresh_game():
+    import game
+    # Built the way game.py builds them at import: the scheduler starts
+    # with the first session
+    game.sessions, game.scheduler = game.create_state(random.Random(0))
+    yield game
+    game.scheduler.stop()
+
+
+# New sessions and scheduler for each test; fresh_game_module is for
+# module-scoped fixtures such as test_state_server.py's forked server
+fresh_game = pytest.fixture(_fresh_game)
+fresh_game_module = pytest.fixture(scope="module")(_fresh_game)
+
+
+@pytest.fixture
+def first_event(fresh_game):
+    """wait(session_id): create the session and wait for its first event.
+
+    The first event is due as soon as a session exists; long-poll tests
+    wait for it so it doesn't wake the poll they are timing.
+    """
+    def wait(session_id, timeout=5):
+        session = fresh_game.sessions.get(session_id)
+        deadline = time.time() + timeout
+        while session.current_event == "NONE" and time.time() < deadline:
+            time.sleep(0.005)
+        assert session.current_event != "NONE"
+    return wait
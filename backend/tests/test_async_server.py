@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+import async_server
+import game
+
+
+pytestmark = pytest.mark.usefixtures('fresh_game')
+
+
+async def call(method, path, query='', body=None):
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'query_string': query.encode()}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps(body).encode() if body else b''}
+
+    async def send(message):
+        sent.append(message)
+
+    await async_server.app(scope, receive, send)
+    status = sent[0]['status']
+    return status, json.loads(b''.join(m.get('body', b'') for m in sent[1:]))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_routes_match_flask_contracts():
+    async def scenario():
+        await call('POST', '/set_gesture', 'session_id=a', {'gesture': 'OPEN_PALM'})
+        _, first = await call('GET', '/get_command', 'session_id=a')
+        await call('POST', '/set_gesture', 'session_id=a', {'gesture': 'FIST'})
+        _, second = await call('GET', '/get_command', 'session_id=a')
+        _, stats = await call('GET', '/get_spell_stats', 'session_id=a')
+        return first, second, stats
+
+    first, second, stats = run(scenario())
+    assert first['command'] == 'ICE_SHARD'
+    assert second['command'] == 'EXPLOSION_COMBO'
+    assert second['combo'] == 3
+    assert stats['spell_usage']['EXPLOSION_COMBO'] == 1
+
+
+def test_long_poll_wakes_on_gesture(first_event):
+    first_event('a')
+
+    async def scenario():
+        _, first = await call('GET', '/get_command', 'session_id=a')
+        poll = asyncio.ensure_future(call('GET', '/get_command', f"session_id=a&since={first['seq']}"))
+        await asyncio.sleep(0.05)
+        assert not poll.done()
+        await call('POST', '/set_gesture', 'session_id=a', {'gesture': 'POINT'})
+        return await asyncio.wait_for(poll, 1)
+
+    status, data = run(scenario())
+    assert status == 200
+    assert data['command'] == 'LIGHTNING'
+
+
+def test_bad_ingest_batch_is_rejected():
+    status, data = run(call('POST', '/ingest_gestures', '', {'transitions': 'FIST'}))
+    assert status == 400
+    assert data['status'] == 'error'
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from camera import CameraStream
+from pipeline import DropOldestQueue, Pipeline
+
+
+class FakeCapture:
+    """Numbered frames, one every `interval` seconds, like a camera driver."""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.count = 0
+        self.released = False
+
+    def read(self):
+        time.sleep(self.interval)
+        self.count += 1
+        return True, self.count
+
+    def release(self):
+        self.released = True
+
+
+def test_stream_keeps_only_the_newest_frame():
+    stream = CameraStream(FakeCapture()).start()
+    try:
+        index, frame = stream.wait_newer(0, timeout=1)
+        assert frame == index
+        time.sleep(0.05)
+        index, frame = stream.latest()
+        assert index > 5 and frame == index
+        assert stream.dropped > 0
+    finally:
+        stream.stop()
+    assert stream.capture.released
+
+
+def test_pipeline_stages_skip_stale_frames():
+    seen = []
+    release = threading.Event()
+
+    def slow(frame):
+        seen.append(frame)
+        release.wait(1)
+        return frame
+
+    pipeline = Pipeline(CameraStream(FakeCapture()), [
+        ("detect", lambda frame: frame * 10),
+        ("classify", slow),
+    ], maxsize=2)
+    assert pipeline.latest(default="NONE") == "NONE"
+    pipeline.start()
+    try:
+        time.sleep(0.05)
+        release.set()
+        deadline = time.time() + 1
+        while len(seen) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+
+        # The blocked classifier left a full queue behind it, so frames were dropped
+        stats = pipeline.stats()
+        assert stats["classify"]["dropped"] > 0
+        assert stats["detect"]["processed"] > stats["classify"]["processed"]
+        assert stats["classify"]["depth"] <= 2
+        assert seen[1] > seen[0] + 10
+        assert pipeline.latest() % 10 == 0
+        assert pipeline.latest(max_age=-1, default="NONE") == "NONE"
+    finally:
+        pipeline.stop()
+
+
+def test_drop_oldest_queue():
+    queue = DropOldestQueue(maxsize=2)
+    for item in (1, 2, 3):
+        queue.put(item)
+    assert (queue.depth, queue.dropped) == (2, 1)
+    assert [queue.get(0), queue.get(0), queue.get(0)] == [2, 3, None]
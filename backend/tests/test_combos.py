@@ -0,0 +1,57 @@
+import pytest
+
+from combos import SPELLS, ComboEngine, Spell
+
+
+def cast(engine, history, gesture, now):
+    spell = engine.match(gesture, now, history)
+    history.append((gesture, now))
+    return spell.name if spell else None
+
+
+def test_default_table_matches_two_step_combos():
+    engine = ComboEngine(SPELLS)
+    history = engine.new_history()
+    assert cast(engine, history, "OPEN_PALM", 0) == "ICE_SHARD"
+    assert cast(engine, history, "FIST", 1) == "EXPLOSION_COMBO"
+    assert cast(engine, history, "POINT", 2) == "LIGHTNING"
+    assert cast(engine, history, "FIST", 3) == "LIGHTNING_STRIKE_COMBO"
+
+
+def test_none_breaks_a_combo():
+    engine = ComboEngine(SPELLS)
+    history = engine.new_history()
+    cast(engine, history, "OPEN_PALM", 0)
+    cast(engine, history, "NONE", 1)
+    assert cast(engine, history, "FIST", 2) == "FIREBALL"
+
+
+def test_unknown_gestures_match_nothing():
+    engine = ComboEngine(SPELLS)
+    history = engine.new_history()
+    assert engine.match("WAVE", 0, history) is None
+    assert engine.match(["FIST"], 0, history) is None
+
+
+def test_longest_combo_within_window_wins():
+    spells = SPELLS + (
+        Spell("TRIPLE", "Triple", ("POINT", "OPEN_PALM", "FIST"), 50, 3, 2.0),
+    )
+    engine = ComboEngine(spells)
+    assert engine.history_length == 2
+
+    history = engine.new_history()
+    cast(engine, history, "POINT", 0)
+    cast(engine, history, "OPEN_PALM", 0.5)
+    assert cast(engine, history, "FIST", 1.0) == "TRIPLE"
+
+    # Too slow for the triple, still fast enough for the two-step combo
+    history = engine.new_history()
+    cast(engine, history, "POINT", 0)
+    cast(engine, history, "OPEN_PALM", 2.0)
+    assert cast(engine, history, "FIST", 3.0) == "EXPLOSION_COMBO"
+
+
+def test_duplicate_sequences_are_rejected():
+    with pytest.raises(ValueError):
+        ComboEngine(SPELLS + (Spell("COPY", "Copy", ("FIST",), 1, 1, None),))
@@ -0,0 +1,253 @@
+import os
+import pickle
+import warnings
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import archmage_cv_ml
+from landmarks import LandmarkBuffer
+from pose_cache import PoseCache
+from tracking import ResolutionGovernor, RoiTracker
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DATA_FILE = os.path.join(DATA_DIR, 'gesture_training_data.csv')
+
+
+def test_import_and_construction_are_lazy():
+    camera = archmage_cv_ml.GestureCamera()
+    assert camera._pipeline is None
+    assert camera.recognizer._hands is None
+    assert camera.recognizer.model is None
+    assert camera.stats() == {}
+    assert archmage_cv_ml.pipeline_stats() == {}
+
+
+@pytest.fixture(scope="module")
+def recognizer():
+    # No pose cache: these tests compare exact model outputs
+    recognizer = archmage_cv_ml.MLGestureRecognizer(cache_size=0)
+    recognizer.load_model()
+    return recognizer
+
+
+@pytest.fixture(scope="module")
+def make_recognizer(recognizer):
+    """MLGestureRecognizer(**options) sharing the loaded model, without a pose cache"""
+    def make(**options):
+        options.setdefault('cache_size', 0)
+        return archmage_cv_ml.MLGestureRecognizer(model=recognizer.model, **options)
+    return make
+
+
+@pytest.fixture(scope="module")
+def sklearn_model():
+    pytest.importorskip('sklearn')
+    with open(os.path.join(DATA_DIR, 'gesture_model.pkl'), 'rb') as f, warnings.catch_warnings():
+        # The checked-in model was pickled by another scikit-learn version
+        warnings.simplefilter('ignore')
+        return pickle.load(f)
+
+
+@pytest.fixture(scope="module")
+def rows():
+    data = np.genfromtxt(DATA_FILE, delimiter=',', skip_header=1, max_rows=200,
+                         usecols=range(63))
+    # Mix in noise so some rows fall under the confidence threshold
+    rng = np.random.default_rng(0)
+    return np.vstack([data, rng.uniform(0, 1, size=(50, 63))])
+
+
+def as_hand(row):
+    """A row of 63 features shaped like MediaPipe's hand landmarks"""
+    return SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in row.reshape(-1, 3)])
+
+
+def test_landmark_buffer_is_reused(rows):
+    buffer = LandmarkBuffer()
+    features = buffer.features
+    for row in rows[:5]:
+        assert buffer.fill(as_hand(row)).features is features
+        np.testing.assert_array_equal(features[0], row.astype(np.float32))
+        xs, ys = row[0::3], row[1::3]
+        assert buffer.area() == pytest.approx((xs.max() - xs.min()) * (ys.max() - ys.min()), rel=1e-5)
+
+
+def test_roi_follows_the_hand_and_maps_back_to_the_frame(rows):
+    tracker = RoiTracker()
+    assert tracker.region(640, 480) is None
+
+    hand = LandmarkBuffer().fill(as_hand(rows[0]))
+    # Shrink the hand so a crop is worth taking
+    hand.points[:, :2] = 0.4 + hand.points[:, :2] * 0.2
+    tracker.found(*hand.bounds())
+    x0, y0, x1, y1 = tracker.region(640, 480)
+    assert x1 - x0 == pytest.approx(y1 - y0, abs=1)
+    min_x, min_y, max_x, max_y = hand.bounds()
+    assert x0 < min_x * 640 and max_x * 640 < x1 and y0 < min_y * 480 and max_y * 480 < y1
+
+    # Landmarks MediaPipe would report relative to the crop map back to the same points
+    crop = (x0 / 640, y0 / 480, (x1 - x0) / 640, (y1 - y0) / 480)
+    relative = hand.points.copy()
+    relative[:, 0] = (relative[:, 0] - crop[0]) / crop[2]
+    relative[:, 1] = (relative[:, 1] - crop[1]) / crop[3]
+    relative[:, 2] /= crop[2]
+    mapped = LandmarkBuffer().fill(as_hand(relative)).to_frame(*crop)
+    np.testing.assert_allclose(mapped.points, hand.points, atol=1e-6)
+
+    # Small moves keep the crop; losing the hand drops it
+    tracker.found(min_x + 0.01, min_y, max_x + 0.01, max_y)
+    assert tracker.region(640, 480) == (x0, y0, x1, y1)
+    tracker.miss()
+    assert tracker.region(640, 480) is None
+    assert tracker.stats() == {'tracked': 1, 'lost': 1, 'cropping': False}
+
+
+def test_resolution_follows_detection_time():
+    governor = ResolutionGovernor(target_fps=30)
+    for _ in range(20):
+        governor.observe(0.1)
+    assert governor.scale == governor.min_scale
+    assert governor.scale_for(640, 480) == pytest.approx(192 / 480)
+    for _ in range(20):
+        governor.observe(0.001)
+    assert governor.scale == 1.0
+
+
+def test_temporal_filter_ignores_blips_and_skips_still_frames(recognizer, make_recognizer, rows):
+    labels = recognizer.predict_gestures(rows)
+    # Not FIST, so a size jump can't turn into a punch
+    steady, held = next((row, label) for row, label in zip(rows, labels) if label not in ("FIST", "NONE"))
+    blip, changed = next((row, label) for row, label in zip(rows, labels) if label not in (held, "NONE"))
+    frames = [steady] * 6 + [blip] + [steady] * 6 + [blip] * 4
+
+    smoothed = make_recognizer()
+    seen = [smoothed.classify(SimpleNamespace(multi_hand_landmarks=[as_hand(row)])) for row in frames]
+
+    # Changes show up on the third frame; the one-frame blip never does
+    assert seen == ["NONE"] * 2 + [held] * 13 + [changed] * 2
+    stats = smoothed.temporal_stats()
+    assert stats['skipped'] > 0
+    assert stats['classified'] + stats['skipped'] == len(frames)
+
+
+def test_pose_cache_keys_on_hand_shape(rows):
+    cache = PoseCache(maxsize=2)
+    hand = LandmarkBuffer().fill(as_hand(rows[0]))
+    key = cache.key(hand)
+    assert cache.get(key) is None
+    cache.put(key, "FIST")
+
+    # Same shape, moved across the frame and slightly bigger
+    hand.points[:, :2] = 0.1 + hand.points[:, :2] * 1.02
+    assert cache.key(hand) == key
+    assert cache.get(key) == "FIST"
+
+    cache.put(cache.key(LandmarkBuffer().fill(as_hand(rows[-1]))), "NONE")
+    cache.put(cache.key(LandmarkBuffer().fill(as_hand(rows[-2]))), "NONE")
+    assert len(cache) == 2 and cache.get(key) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def two_hands(left, right):
+    handedness = [SimpleNamespace(classification=[SimpleNamespace(label=label)])
+                  for label in ("Left", "Right")]
+    return SimpleNamespace(multi_hand_landmarks=[as_hand(left), as_hand(right)],
+                           multi_handedness=handedness)
+
+
+def test_both_hands_are_classified_in_one_call(recognizer, make_recognizer, rows):
+    labels = recognizer.predict_gestures(rows)
+    palm = rows[labels.index("OPEN_PALM")]
+    fist = rows[labels.index("FIST")]
+
+    both = make_recognizer(smooth=False)
+    calls = []
+    predict = both.predict_gestures
+    both.predict_gestures = lambda features: calls.append(len(features)) or predict(features)
+
+    recognition = both.recognize(two_hands(palm, fist))
+    assert recognition.hands == (("Left", "OPEN_PALM"), ("Right", "FIST"))
+    assert recognition.gesture == "OPEN_PALM"
+    assert recognition.two_hand == "NONE"
+    assert calls == [2]
+
+    # Two-hand gestures have no spell, so the reported gesture stays a single hand's
+    recognition = both.recognize(two_hands(palm, palm))
+    assert (recognition.gesture, recognition.two_hand) == ("OPEN_PALM", "DOUBLE_PALM")
+    # Hands keep their own punch state: a growing right fist punches, the left hand doesn't
+    bigger = fist.copy()
+    bigger[0::3] = bigger[0::3].mean() + (bigger[0::3] - bigger[0::3].mean()) * 1.5
+    bigger[1::3] = bigger[1::3].mean() + (bigger[1::3] - bigger[1::3].mean()) * 1.5
+    both.recognize(two_hands(palm, fist))
+    assert both.recognize(two_hands(palm, bigger)).hands == (("Left", "OPEN_PALM"), ("Right", "PUNCH"))
+
+
+def test_tracker_only_crops_while_every_hand_is_tracked(make_recognizer, rows):
+    def placed(row, x):
+        hand = row.copy()
+        hand[0::3] = x + hand[0::3] * 0.1
+        hand[1::3] = 0.4 + hand[1::3] * 0.1
+        return hand
+
+    left, right = placed(rows[0], 0.3), placed(rows[1], 0.45)
+    tracked = make_recognizer(smooth=False)
+
+    # One hand of two: keep searching the whole frame for the other
+    for _ in range(3):
+        assert tracked.roi.region(640, 480) is None
+        tracked.recognize(SimpleNamespace(multi_hand_landmarks=[as_hand(left)]))
+
+    # Both hands: crop around them, until one goes missing again
+    tracked.recognize(two_hands(left, right))
+    x0, y0, x1, y1 = tracked.roi.region(640, 480)
+    assert x0 < left[0::3].min() * 640 and right[0::3].max() * 640 < x1
+    tracked.recognize(SimpleNamespace(multi_hand_landmarks=[as_hand(left)]))
+    assert tracked.roi.region(640, 480) is None
+
+
+def test_timings_and_profiler_cover_recognized_frames(make_recognizer, rows, tmp_path):
+    timed = make_recognizer(smooth=False)
+    assert timed.timing_summary() == {}
+
+    timed.enable_timings()
+    profiler = timed.profile(3, str(tmp_path / "frames.prof"))
+    for row in rows[:5]:
+        timed.recognize(SimpleNamespace(multi_hand_landmarks=[as_hand(row)]))
+
+    summary = timed.timing_summary()
+    assert set(summary['stages']) == {'features', 'forest', 'classify'}
+    assert summary['stages']['forest']['count'] == 5
+    assert summary['fps'] > 0
+
+    stats = profiler.wait(timeout=1)
+    assert timed.profiler is None
+    assert any(name == 'predict_gestures' for _, _, name in stats.stats)
+    assert (tmp_path / "frames.prof").exists()
+
+
+def test_flat_forest_matches_sklearn(recognizer, sklearn_model, rows):
+    assert isinstance(recognizer.model, archmage_cv_ml.FlatForest)
+    np.testing.assert_allclose(recognizer.model.predict_proba(rows),
+                               sklearn_model.predict_proba(rows), atol=1e-12)
+
+    expected = [str(p) if max(proba) > archmage_cv_ml.CONFIDENCE_THRESHOLD else "NONE"
+                for p, proba in zip(sklearn_model.predict(rows), sklearn_model.predict_proba(rows))]
+    assert recognizer.predict_gestures(rows) == expected
+    assert "NONE" in expected
+    assert [recognizer._get_static_gesture(as_hand(row)) for row in rows] == expected
+
+
+def test_early_exit_makes_the_same_decisions(recognizer, rows):
+    expected = recognizer.predict_gestures(rows)
+    labels, trees = recognizer.model.decide(rows, archmage_cv_ml.CONFIDENCE_THRESHOLD)
+    assert [label or "NONE" for label in labels] == expected
+    assert trees.max() <= recognizer.model.n_trees
+    assert trees.mean() < recognizer.model.n_trees
+
+    recognizer.early_exit = True
+    try:
+        assert [recognizer.predict_gestures(row[np.newaxis])[0] for row in rows] == expected
+    finally:
+        recognizer.early_exit = False
@@ -0,0 +1,48 @@
+import logging
+import multiprocessing
+
+import gamelog
+
+
+def record(msg, created, level=logging.INFO, **extra):
+    r = logging.LogRecord('archmage.test', level, __file__, 0, msg, (), None)
+    r.created = created
+    r.__dict__.update(extra)
+    return r
+
+
+def test_rate_limit_is_per_message_type():
+    f = gamelog.RateLimitFilter(default_rate=2)
+    passed = [f.filter(record("DETECTED: %s", 100.0)) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert f.filter(record("COMMAND SENT: %s", 100.0))
+    assert f.dropped == 3
+
+    # Tokens refill over time
+    assert f.filter(record("DETECTED: %s", 100.5))
+
+
+def test_per_call_rate_and_warnings():
+    f = gamelog.RateLimitFilter(default_rate=1)
+    assert all(f.filter(record("boom", 5.0, logging.WARNING)) for _ in range(5))
+
+    once = [f.filter(record("frame", 5.0, logging.WARNING, **gamelog.per_second(1))) for _ in range(3)]
+    assert once == [True, False, False]
+
+
+def test_forked_children_get_their_own_listener():
+    gamelog.set_level('WARNING')
+    try:
+        ctx = multiprocessing.get_context('fork')
+        results = ctx.Queue()
+
+        def child():
+            results.put((gamelog._listener._thread.is_alive(),
+                         logging.getLogger('archmage').level))
+
+        process = ctx.Process(target=child)
+        process.start()
+        assert results.get(timeout=10) == (True, logging.WARNING)
+        process.join()
+    finally:
+        gamelog.set_level(gamelog.LOG_LEVEL)
@@ -0,0 +1,32 @@
+import threading
+
+import metrics
+
+
+def test_histogram_buckets_are_cumulative_across_threads():
+    histogram = metrics.Histogram('latency', "test", buckets=(0.1, 1.0))
+
+    def record():
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples = {(name, labels.get('le')): value for name, labels, value in histogram.samples()}
+    assert samples[('latency_bucket', '0.1')] == 4
+    assert samples[('latency_bucket', '1.0')] == 8
+    assert samples[('latency_bucket', '+Inf')] == 12
+    assert samples[('latency_count', None)] == 12
+    assert abs(samples[('latency_sum', None)] - 4 * 5.55) < 1e-9
+
+
+def test_render_escapes_labels():
+    counter = metrics.Counter('hits_total', "test", ('route',))
+    counter.labels('/a"b').inc(2)
+    text = metrics.Registry(counter).render()
+    assert 'hits_total{route="/a\\"b"} 2' in text
+    assert '# TYPE hits_total counter' in text
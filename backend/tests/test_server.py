@@ -0,0 +1,262 @@
+import json
+import random
+import threading
+import time
+
+import pytest
+
+import game
+import server
+from events import EventScheduler
+
+
+@pytest.fixture
+def client(fresh_game):
+    server.app.config['TESTING'] = True
+    return server.app.test_client()
+
+
+def set_gesture(client, gesture, session_id="p1"):
+    return client.post(f'/set_gesture?session_id={session_id}', json={'gesture': gesture})
+
+
+def get_command(client, session_id="p1"):
+    return client.get(f'/get_command?session_id={session_id}').get_json()
+
+
+def test_single_gesture_casts_spell(client):
+    set_gesture(client, 'FIST')
+    data = get_command(client)
+    assert data['command'] == 'FIREBALL'
+    assert data['combo'] == 1
+
+
+def test_two_step_combo(client):
+    set_gesture(client, 'OPEN_PALM')
+    assert get_command(client)['command'] == 'ICE_SHARD'
+    set_gesture(client, 'FIST')
+    data = get_command(client)
+    assert data['command'] == 'EXPLOSION_COMBO'
+    assert data['combo'] == 3
+
+
+def test_sessions_are_independent(client):
+    set_gesture(client, 'FIST', session_id='a')
+    assert get_command(client, 'a')['command'] == 'FIREBALL'
+    assert get_command(client, 'b')['command'] == 'NONE'
+
+    stats_a = client.get('/get_spell_stats?session_id=a').get_json()
+    stats_b = client.get('/get_spell_stats?session_id=b').get_json()
+    assert stats_a['favorite_spell'] == 'FIREBALL'
+    assert stats_b['favorite_spell'] is None
+
+
+def test_non_string_gesture_is_rejected(client):
+    assert set_gesture(client, ['FIST']).status_code == 400
+    # The session keeps working
+    set_gesture(client, 'FIST')
+    assert get_command(client)['command'] == 'FIREBALL'
+
+
+def test_first_session_starts_the_event_scheduler(client):
+    assert game.scheduler._thread is None
+    get_command(client)
+    assert game.scheduler._thread.is_alive()
+    assert game.scheduler.next_deadline() is not None
+
+
+def test_session_id_in_json_body(client):
+    client.post('/set_tutorial_mode', json={'session_id': 'tut'})
+    resp = client.post('/add_mana', json={'session_id': 'tut', 'amount': -899})
+    assert resp.get_json()['mana'] == game.MAX_MANA
+
+
+def test_idle_sessions_are_evicted():
+    store = game.SessionStore(game.MANA_COSTS, game.MAX_MANA, idle_timeout=60)
+    store.get('old', now=0)
+    store.get('new', now=50)
+    assert store.evict_idle(now=100) == 1
+    assert 'old' not in store
+    assert 'new' in store
+
+
+def test_command_stream_pushes_changes(client):
+    resp = client.get('/command_stream?session_id=p1', buffered=False)
+    messages = resp.response
+
+    first = json.loads(next(messages).decode()[len('data: '):])
+    assert first['command'] == 'NONE'
+    assert first['mana_regen_rate'] == game.MANA_REGEN_RATE
+
+    set_gesture(client, 'POINT')
+    pushed = json.loads(next(messages).decode()[len('data: '):])
+    assert pushed['command'] == 'LIGHTNING'
+    assert pushed['combo'] == 1
+    resp.close()
+
+
+def test_long_poll_returns_immediately_when_behind(client):
+    first = get_command(client)
+    set_gesture(client, 'FIST')
+    data = client.get(f"/get_command?session_id=p1&since={first['seq']}").get_json()
+    assert data['command'] == 'FIREBALL'
+    assert data['seq'] > first['seq']
+
+
+def test_long_poll_waits_for_gesture(client, first_event):
+    first_event('p1')
+    seq = get_command(client)['seq']
+
+    def later():
+        time.sleep(0.2)
+        set_gesture(server.app.test_client(), 'OPEN_PALM')
+
+    threading.Thread(target=later).start()
+    start = time.time()
+    data = client.get(f'/get_command?session_id=p1&since={seq}').get_json()
+    assert 0.1 < time.time() - start < game.LONG_POLL_TIMEOUT
+    assert data['command'] == 'ICE_SHARD'
+    # Same mana fields as the stream, so the client can interpolate between replies
+    assert data['mana_regen_rate'] == game.MANA_REGEN_RATE
+    assert data['mana_updated_at'] <= data['server_time']
+
+
+def test_ingest_processes_every_transition(client):
+    resp = client.post('/ingest_gestures?session_id=p1', json={'transitions': [
+        {'gesture': 'OPEN_PALM', 't': 1000},
+        {'gesture': 'FIST', 't': 1100},
+        {'gesture': 'NONE', 't': 1300},
+    ]})
+    data = resp.get_json()
+    assert data['commands'] == ['ICE_SHARD', 'EXPLOSION_COMBO', 'NONE']
+    assert data['combo'] == 3
+    assert data['gesture'] == 'NONE'
+
+    # A later plain poll must not replay the batch
+    assert get_command(client)['command'] == 'NONE'
+
+
+@pytest.mark.parametrize('times', [(1000, 1000), (None, None), (1000, 900)],
+                         ids=['equal', 'missing', 'out-of-order'])
+def test_ingest_replays_every_cast_whatever_the_timestamps(client, times):
+    transitions = [{'gesture': gesture} if t is None else {'gesture': gesture, 't': t}
+                   for gesture, t in zip(('OPEN_PALM', 'FIST'), times)]
+    data = client.post('/ingest_gestures?session_id=p1', json={'transitions': transitions}).get_json()
+    assert data['commands'] == ['ICE_SHARD', 'EXPLOSION_COMBO']
+
+
+def test_ingest_batch_overlapping_an_earlier_cast(client):
+    set_gesture(client, 'POINT')
+    assert get_command(client)['command'] == 'LIGHTNING'
+    # The batch's first transition "happened" before that poll's cast
+    resp = client.post('/ingest_gestures?session_id=p1', json={'transitions': [
+        {'gesture': 'OPEN_PALM', 't': 0},
+        {'gesture': 'FIST', 't': 500},
+    ]})
+    assert resp.get_json()['commands'] == ['ICE_SHARD', 'EXPLOSION_COMBO']
+
+
+def test_ingest_rejects_oversized_batch(client):
+    transitions = [{'gesture': 'FIST', 't': i} for i in range(game.MAX_INGEST_BATCH + 1)]
+    resp = client.post('/ingest_gestures', json={'transitions': transitions})
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize('transition', [
+    {'gesture': 'FIST', 't': 'soon'},
+    {'gesture': 'FIST', 't': None},
+    {'gesture': 'FIST', 't': True},
+    {'gesture': {'name': 'FIST'}, 't': 0},
+])
+def test_ingest_rejects_bad_transition(client, transition):
+    resp = client.post('/ingest_gestures?session_id=p1', json={'transitions': [transition]})
+    assert resp.status_code == 400
+    # Nothing from the rejected batch reached the session
+    assert get_command(client)['gesture'] == 'NONE'
+
+
+def test_mana_regenerates_in_closed_form(client):
+    session = game.sessions.get('p1')
+    start = session.mana_time + 1
+    game.set_mana(session, 40, now=start)
+    assert game.mana_at(session, start) == 40
+    assert game.mana_at(session, start + 2.5) == 40 + 2.5 * game.MANA_REGEN_RATE
+    assert game.mana_at(session, start + 1000) == game.MAX_MANA
+    # Reading does not move the stored value
+    assert (session.mana_value, session.mana_time) == (40, start)
+
+
+def test_spending_mana(client):
+    set_gesture(client, 'POINT')
+    data = get_command(client)
+    assert data['command'] == 'LIGHTNING'
+    cost = game.MANA_COSTS['LIGHTNING']
+    assert game.MAX_MANA - cost <= data['mana'] < game.MAX_MANA - cost + 1
+
+
+def manual_scheduler(seed=0, duration=game.EVENT_DURATION, cooldown=game.EVENT_COOLDOWN):
+    """A store whose events only fire when the test calls run_due()"""
+    store = game.SessionStore(game.MANA_COSTS, game.MAX_MANA)
+    scheduler = EventScheduler(store, game.POSSIBLE_EVENTS, duration, cooldown,
+                               rng=random.Random(seed))
+    store.on_create = scheduler.add_session
+    return store, scheduler
+
+
+def test_scheduler_starts_and_expires_events():
+    store, scheduler = manual_scheduler()
+    session = store.get('p1')
+    start = time.time()
+    assert scheduler.run_due(start) == 1
+    assert session.current_event in game.POSSIBLE_EVENTS
+    assert session.event_deadline == start + game.EVENT_DURATION
+
+    # Nothing is due until the deadline
+    assert scheduler.run_due(start + 1) == 0
+    assert scheduler.run_due(start + game.EVENT_DURATION) == 1
+    assert session.current_event == 'NONE'
+    assert session.event_deadline == start + game.EVENT_DURATION + game.EVENT_COOLDOWN
+
+
+def test_scheduler_is_reproducible_with_seeded_rng():
+    def run(seed):
+        store, scheduler = manual_scheduler(seed, duration=1, cooldown=1)
+        session = store.get('p1', now=0)
+        seen = []
+        for t in range(0, 40, 2):
+            scheduler.run_due(t)
+            seen.append(session.current_event)
+        return seen
+
+    assert run(7) == run(7)
+
+
+def test_scheduler_skips_evicted_sessions():
+    store, scheduler = manual_scheduler()
+    store.get('gone', now=0)
+    store.evict_idle(now=store.idle_timeout + 1)
+    assert scheduler.run_due() == 0
+
+
+def metric_value(text, sample):
+    for line in text.splitlines():
+        if line.startswith(sample + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_metrics_count_routes_and_outcomes(client):
+    before = client.get('/metrics').data.decode()
+    client.post('/set_tutorial_mode?session_id=p1')
+    client.post('/add_mana?session_id=p1', json={'amount': -100})
+    client.post('/add_mana?session_id=p1', json={'amount': -100})
+    set_gesture(client, 'FIST')
+    assert get_command(client)['command'] == 'INSUFFICIENT_MANA'
+
+    text = client.get('/metrics').data.decode()
+    outcome = 'archmage_commands_total{command="INSUFFICIENT_MANA"}'
+    assert metric_value(text, outcome) == metric_value(before, outcome) + 1
+    assert metric_value(text, 'archmage_active_sessions') == 1
+    polls = 'archmage_http_request_duration_seconds_count{method="GET",route="/get_command"}'
+    assert metric_value(text, polls) == metric_value(before, polls) + 1
+    assert 'archmage_gesture_to_command_seconds_bucket{le="+Inf"}' in text
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+import game
+import state_server
+
+
+@pytest.fixture(scope="module")
+def client(fresh_game_module):
+    # The server process is forked from this one, with fresh_game_module's sessions
+    address = ('127.0.0.1', 5199)
+    process = state_server.start(address, authkey=b'test')
+    yield state_server.StateClient(address, authkey=b'test')
+    process.terminate()
+    process.join()
+
+
+def test_calls_share_state_across_clients(client):
+    other = state_server.StateClient(client.address, authkey=b'test')
+    client.set_gesture('p1', 'OPEN_PALM')
+    assert client.get_command('p1')['command'] == 'ICE_SHARD'
+    other.set_gesture('p1', 'FIST')
+    data = other.get_command('p1')
+    assert data['command'] == 'EXPLOSION_COMBO'
+    assert data['combo'] == 3
+
+
+def test_errors_are_raised_in_the_caller(client):
+    with pytest.raises(game.BadRequest):
+        client.ingest_gestures('p1', 'not a list')
+
+
+def test_only_service_methods_are_exposed(client):
+    with pytest.raises(AttributeError):
+        client.evict_everything
+
+
+def test_connection_pool_is_capped(client):
+    capped = state_server.StateClient(client.address, authkey=b'test', max_connections=2)
+    threads = [threading.Thread(target=lambda: [capped.active_sessions() for _ in range(20)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert capped._pool.qsize() <= 2
+
+
+def test_an_authkey_is_required(monkeypatch):
+    with pytest.raises(ValueError):
+        state_server.StateClient(('127.0.0.1', 5199))
+    monkeypatch.setenv('ARCHMAGE_STATE_SERVER', '127.0.0.1:5199')
+    monkeypatch.delenv('ARCHMAGE_STATE_AUTHKEY', raising=False)
+    with pytest.raises(RuntimeError):
+        state_server.connect_from_env()
@@ -0,0 +1,27 @@
+import time
+
+import archmage_cv_ml
+from streams import StreamManager
+
+
+def fake_stream(stream, source, channel, stop, options):
+    # Stands in for run_stream: every "frame" of source shows one gesture
+    recognition = archmage_cv_ml.Recognition(source, (archmage_cv_ml.HandGesture("Right", source),))
+    while not stop.wait(0.01):
+        channel.put((stream, 'result', recognition))
+
+
+def test_each_stream_reports_its_own_worker():
+    with StreamManager(["FIST", "OPEN_PALM"], target=fake_stream) as streams:
+        deadline = time.time() + 30
+        while time.time() < deadline and "NONE" in (streams.get_gesture(0), streams.get_gesture(1)):
+            time.sleep(0.05)
+
+        assert streams.get_gesture(0) == "FIST"
+        assert streams.get_hands(1) == (("Right", "OPEN_PALM"),)
+        stats = streams.stats()
+        assert all(s['alive'] and s['results'] > 0 for s in stats)
+        processes = list(streams._processes)
+
+    assert not streams.running
+    assert not any(process.is_alive() for process in processes)
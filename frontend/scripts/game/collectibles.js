@@ -145,7 +145,7 @@ function checkManaBallCollision(projectileX, projectileY, projectileSize) {
                 window.VisualEffects.showManaGainFeedback(manaAmount, x, y);
             }
             
-            fetch('http://localhost:5001/add_mana', {
+            fetch(window.GameState.backendUrl('/add_mana'), {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify({amount: manaAmount})
@@ -1,10 +1,105 @@
 // Game Loop Module - Main game loop
 
+// Command stream: the backend pushes a message only when the command, mana,
+// combo or event changes, instead of us polling /get_command every frame.
+// Browsers without EventSource long-poll /get_command?since=<seq> instead.
+let commandStream = null;
+let longPolling = false;
+let streamState = null;
+let pendingCommands = [];
+let serverClockOffset = 0;
+// Bumped by resetCommandState() so a long-poll from the last game drops its reply
+let commandGeneration = 0;
+
+function receiveCommandState(data) {
+    if (data.server_time !== undefined) {
+        serverClockOffset = Date.now() / 1000 - data.server_time;
+    }
+    streamState = data;
+    if (data.command !== "NONE") {
+        pendingCommands.push(data.command);
+    }
+}
+
+function connectCommandStream() {
+    if (commandStream) return;
+    commandStream = new EventSource(window.GameState.backendUrl('/command_stream'));
+    commandStream.onmessage = (message) => {
+        receiveCommandState(JSON.parse(message.data));
+    };
+    commandStream.onerror = () => {
+        console.error("Backend server is down!");
+    };
+}
+
+async function longPollCommands() {
+    if (longPolling) return;
+    longPolling = true;
+    const generation = commandGeneration;
+    let seq = -1;
+    while (window.GameState.isGameRunning() && generation === commandGeneration) {
+        try {
+            const response = await fetch(window.GameState.backendUrl('/get_command') + `&since=${seq}`);
+            const data = await response.json();
+            if (generation !== commandGeneration) break;
+            seq = data.seq;
+            receiveCommandState(data);
+        } catch (error) {
+            console.error("Backend server is down!");
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+    if (generation === commandGeneration) longPolling = false;
+}
+
+function closeCommandStream() {
+    if (commandStream) {
+        commandStream.close();
+        commandStream = null;
+    }
+}
+
+// A new game starts from nothing: no queued commands or state from the last one
+function resetCommandState() {
+    closeCommandStream();
+    commandGeneration++;
+    longPolling = false;
+    streamState = null;
+    pendingCommands = [];
+    serverClockOffset = 0;
+}
+
+// Mana regenerates between messages, so extrapolate from the last one
+function interpolateMana(state) {
+    if (!state.mana_regen_rate || state.mana_updated_at === undefined) return state.mana;
+    const serverNow = Date.now() / 1000 - serverClockOffset;
+    const elapsed = Math.max(0, serverNow - state.mana_updated_at);
+    return Math.min(state.max_mana, state.mana + state.mana_regen_rate * elapsed);
+}
+
+// One queued command per frame, "NONE" when nothing new arrived
+function nextCommandState() {
+    if (window.EventSource) {
+        connectCommandStream();
+    } else {
+        longPollCommands();
+    }
+    if (!streamState) return null;
+    return {
+        ...streamState,
+        command: pendingCommands.length > 0 ? pendingCommands.shift() : "NONE",
+        mana: interpolateMana(streamState)
+    };
+}
+
 async function gameLoop() {
     if (!window.GameState) return;
     
     const gameRunning = window.GameState.isGameRunning();
-    if (!gameRunning) return;
+    if (!gameRunning) {
+        closeCommandStream();
+        return;
+    }
     
     let command = "NONE";
     let event = "NONE";
@@ -24,8 +119,11 @@ async function gameLoop() {
     }
 
     try {
-        const response = await fetch('http://localhost:5001/get_command');
-        const data = await response.json();
+        const data = nextCommandState();
+        if (!data) {
+            requestAnimationFrame(gameLoop);
+            return;
+        }
 
         command = data.command;
         event = data.event || "NONE";
@@ -309,6 +407,7 @@ async function gameLoop() {
 }
 
 window.GameLoop = {
-    gameLoop
+    gameLoop,
+    resetCommandState
 };
 
@@ -227,7 +227,7 @@ function showGameOverScreen(isVictory) {
     const bossHealth = window.GameState ? window.GameState.getBossHealth() : 0;
     const maxBossHealth = window.GameState ? window.GameState.getMaxBossHealth() : 150;
     
-    fetch('http://localhost:5001/get_spell_stats')
+    fetch(window.GameState.backendUrl('/get_spell_stats'))
         .then(response => response.json())
         .then(data => {
             const favoriteSpell = data.favorite_spell_display || "None";
@@ -371,12 +371,16 @@ function replayGame() {
     
     window.GameState.setGameRunning(true);
     
-    fetch('http://localhost:5001/reset_combo', {
+    if (window.GameLoop && window.GameLoop.resetCommandState) {
+        window.GameLoop.resetCommandState();
+    }
+    
+    fetch(window.GameState.backendUrl('/reset_combo'), {
         method: 'POST',
         headers: {'Content-Type': 'application/json'}
     }).catch(err => console.error('Error resetting combo:', err));
     
-    fetch('http://localhost:5001/reset_spell_stats', {
+    fetch(window.GameState.backendUrl('/reset_spell_stats'), {
         method: 'POST',
         headers: {'Content-Type': 'application/json'}
     }).catch(err => console.error('Error resetting spell stats:', err));
@@ -28,6 +28,10 @@ function initializeGame() {
         window.GameState.setGameRunning(true);
     }
     
+    if (window.GameLoop && window.GameLoop.resetCommandState) {
+        window.GameLoop.resetCommandState();
+    }
+    
     if (window.Sounds && window.Sounds.backgroundMusic) {
         window.Sounds.backgroundMusic.play().catch(() => {});
     }
@@ -39,6 +39,23 @@ const FINISHER_TIME_LIMIT = 10000;
 let hintShown = false;
 const HINT_DELAY = 5000;
 
+const BACKEND_URL = 'http://localhost:5001';
+
+// Each tab gets its own backend session; sessionStorage keeps it across
+// the tutorial -> game page navigation.
+function getSessionId() {
+    let sessionId = sessionStorage.getItem('archmageSessionId');
+    if (!sessionId) {
+        sessionId = Math.random().toString(36).slice(2) + Date.now().toString(36);
+        sessionStorage.setItem('archmageSessionId', sessionId);
+    }
+    return sessionId;
+}
+
+function backendUrl(path) {
+    return `${BACKEND_URL}${path}?session_id=${encodeURIComponent(getSessionId())}`;
+}
+
 window.GameState = {
     getPlayerHealth: () => playerHealth,
     setPlayerHealth: (value) => { playerHealth = value; },
@@ -106,6 +123,9 @@ window.GameState = {
     setHintShown: (value) => { hintShown = value; },
     HINT_DELAY,
     
+    getSessionId,
+    backendUrl,
+    
     MAX_PLAYER_HEALTH,
     MAX_BOSS_HEALTH
 };
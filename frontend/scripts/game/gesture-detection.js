@@ -53,7 +53,7 @@ async function sendGestureToBackend(gesture) {
             window.VisualEffects.showGestureFeedback(gesture);
         }
         try {
-            await fetch('http://localhost:5001/set_gesture', {
+            await fetch(window.GameState.backendUrl('/set_gesture'), {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -54,7 +54,7 @@ function updatePlayerHealth(newHealth) {
     if (newHealth < oldHealth && window.GameState.getComboCount() > 0) {
         window.GameState.setComboCount(0);
         window.GameState.setComboJustReset(true);
-        fetch('http://localhost:5001/reset_combo', {
+        fetch(window.GameState.backendUrl('/reset_combo'), {
             method: 'POST',
             headers: {'Content-Type': 'application/json'}
         }).catch(() => {});
@@ -11,6 +11,16 @@ const REQUIRED_CASTS = 2;
 let lastCommand = "NONE";
 let lastHandPosition = null;
 
+// Backend session shared with the game page (see game-state.js)
+function backendUrl(path) {
+    let sessionId = sessionStorage.getItem('archmageSessionId');
+    if (!sessionId) {
+        sessionId = Math.random().toString(36).slice(2) + Date.now().toString(36);
+        sessionStorage.setItem('archmageSessionId', sessionId);
+    }
+    return `http://localhost:5001${path}?session_id=${encodeURIComponent(sessionId)}`;
+}
+
 // Sound effects system
 const sounds = {
     fireball: new Audio('../../assets/sounds/fireball.mp3'),
@@ -82,7 +92,7 @@ async function sendGestureToBackend(gesture) {
     if (gesture !== lastSentGesture) {
         lastSentGesture = gesture;
         try {
-            await fetch('http://localhost:5001/set_gesture', {
+            await fetch(backendUrl('/set_gesture'), {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify({ gesture: gesture })
@@ -471,14 +481,69 @@ function playTutorialLightning() {
     }, 60);
 }
 
+// Commands pushed by the backend (see game-loop.js); browsers without
+// EventSource long-poll /get_command?since=<seq> instead
+let commandStream = null;
+let longPolling = false;
+let pendingCommands = [];
+
+function receiveCommand(data) {
+    if (data.command !== "NONE") {
+        pendingCommands.push(data.command);
+    }
+}
+
+function connectCommandStream() {
+    if (commandStream) return;
+    commandStream = new EventSource(backendUrl('/command_stream'));
+    commandStream.onmessage = (message) => {
+        receiveCommand(JSON.parse(message.data));
+    };
+    commandStream.onerror = () => {
+        console.error("Backend server is down!");
+    };
+}
+
+async function longPollCommands() {
+    if (longPolling) return;
+    longPolling = true;
+    let seq = -1;
+    while (longPolling) {
+        try {
+            const response = await fetch(backendUrl('/get_command') + `&since=${seq}`);
+            const data = await response.json();
+            seq = data.seq;
+            receiveCommand(data);
+        } catch (error) {
+            console.error("Backend server is down!");
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+}
+
+function stopCommands() {
+    longPolling = false;
+    if (commandStream) {
+        commandStream.close();
+        commandStream = null;
+    }
+}
+
+function nextCommand() {
+    if (window.EventSource) {
+        connectCommandStream();
+    } else {
+        longPollCommands();
+    }
+    return pendingCommands.length > 0 ? pendingCommands.shift() : "NONE";
+}
+
 // Tutorial game loop
 async function tutorialLoop() {
     let command = "NONE";
     
     try {
-        const response = await fetch('http://localhost:5001/get_command');
-        const data = await response.json();
-        command = data.command;
+        command = nextCommand();
     } catch (error) {
         console.error("Backend server is down!");
         requestAnimationFrame(tutorialLoop);
@@ -514,12 +579,14 @@ async function tutorialLoop() {
         if (command === "THUMBS_UP" || lastSentGesture === "THUMBS_UP") {
             console.log("Thumbs up detected! Starting countdown...");
             // Reset mana to normal before redirecting
-            fetch('http://localhost:5001/add_mana', {
+            fetch(backendUrl('/add_mana'), {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify({amount: -899}) // Reset from 999 to 100
             }).catch(() => {});
             
+            stopCommands();
+            
             // Show countdown screen
             showCountdownScreen();
             return;
@@ -539,7 +606,7 @@ document.addEventListener('DOMContentLoaded', function() {
     console.log("Tutorial loaded!");
     
     // Set tutorial mode (unlimited mana) in backend
-    fetch('http://localhost:5001/set_tutorial_mode', {
+    fetch(backendUrl('/set_tutorial_mode'), {
         method: 'POST',
         headers: {'Content-Type': 'application/json'}
     }).catch(err => console.error('Error setting tutorial mode:', err));